@@ -19,12 +19,38 @@
 # https://github.com/Tomha/python-gtk-themed-icon-chooser
 
 import re
+import time
 from threading import Thread
 
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import GLib, GObject, Gtk, Pango
 
+# Milliseconds to wait after the last keypress before filtering icons.
+_FILTER_DELAY = 150
+
+# Icon listing caches, keyed by Gtk.IconTheme. See get_theme_cache.
+_theme_caches = {}
+
+
+def get_theme_cache(icon_theme=None):
+    """Get the shared icon listing cache for an icon theme.
+
+    The dialog, button and combo box all list icons through this cache, so a
+    theme is only scanned once per context until it changes.
+
+    :param icon_theme: Gtk.IconTheme to get the cache for, or None for the
+        default theme.
+    :return: _IconThemeCache for the theme.
+    """
+    if icon_theme is None:
+        icon_theme = Gtk.IconTheme.get_default()
+    cache = _theme_caches.get(icon_theme)
+    if cache is None:
+        cache = _IconThemeCache(icon_theme)
+        _theme_caches[icon_theme] = cache
+    return cache
+
 
 class IconChooserDialog(Gtk.Dialog):
     # TODO: Not all memory created by the dialog seems to be released.
@@ -33,14 +59,13 @@ class IconChooserDialog(Gtk.Dialog):
     The name of the selection icon is made available as a result of the run
     method, or by the get_selected_icon_name method.
 
-    NOTE: If 1000s of icons are displayed this is 1000s of widgets. They are
-    loaded asynchronously to prevent blocking the main thread, but they must
-    still be show()n from the main thread, which may momentarily block it. This
-    can be limited by filtering the available icon selection beforehand.
+    Icons are displayed by a Gtk.IconView backed by a Gtk.ListStore of icon
+    names, so no widgets are created per icon. Cell renderers have a fixed
+    size, which lets the view lay out thousands of items without loading them;
+    an icon is only loaded from the theme when its cell is drawn.
     """
     def __init__(self):
         super().__init__()
-        GLib.threads_init()
 
         self.set_default_size(500, 500)
         self.set_icon_name("gtk-filter")
@@ -52,6 +77,9 @@ class IconChooserDialog(Gtk.Dialog):
         self._filter_term = ""
         self._selected_icon = ""
         self._use_regex = False
+        self._search_index = _IconSearchIndex([])
+        self._visible_icons = None
+        self._filter_source = None
 
         # Widgets start here
 
@@ -89,15 +117,33 @@ class IconChooserDialog(Gtk.Dialog):
 
         # Icon Previews
 
-        self._icon_box = Gtk.FlowBox()
-        self._icon_box.set_orientation(Gtk.Orientation.HORIZONTAL)
-        self._icon_box.set_column_spacing(8)
-        self._icon_box.set_row_spacing(8)
-        self._icon_box.set_homogeneous(True)
-        self._icon_box.set_valign(Gtk.Align.START)
+        # Columns are the icon name, the name displayed beneath the icon and
+        #   the icon's position in the search index.
+        self._icon_store = Gtk.ListStore(str, str, int)
+        self._icon_filter = self._icon_store.filter_new()
+        self._icon_filter.set_visible_func(self._is_icon_visible)
+
+        self._pixbuf_renderer = Gtk.CellRendererPixbuf()
+        self._text_renderer = Gtk.CellRendererText()
+        self._text_renderer.set_alignment(0.5, 0)
+        self._text_renderer.set_property("alignment", Pango.Alignment.CENTER)
+        self._text_renderer.set_property("wrap-mode", Pango.WrapMode.WORD_CHAR)
+        self._text_renderer.set_property("ellipsize", Pango.EllipsizeMode.END)
+
+        self._icon_view = Gtk.IconView()
+        self._icon_view.set_model(self._icon_filter)
+        self._icon_view.set_item_orientation(Gtk.Orientation.VERTICAL)
+        self._icon_view.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self._icon_view.set_column_spacing(8)
+        self._icon_view.set_row_spacing(8)
+        self._icon_view.set_tooltip_column(0)
+        self._icon_view.pack_start(self._pixbuf_renderer, False)
+        self._icon_view.add_attribute(self._pixbuf_renderer, "icon-name", 0)
+        self._icon_view.pack_start(self._text_renderer, False)
+        self._icon_view.add_attribute(self._text_renderer, "text", 1)
 
         self._scroller = Gtk.ScrolledWindow()
-        self._scroller.add(self._icon_box)
+        self._scroller.add(self._icon_view)
 
         # A slight hack to get the theme's background color for widgets.
         context = self._filter_entry.get_style_context()
@@ -107,14 +153,6 @@ class IconChooserDialog(Gtk.Dialog):
                                                        background_color)
         self._icon_box_frame.add(self._scroller)
 
-        # Spinner
-        self._spinner = Gtk.Spinner()
-        self._spinner.set_size_request(48, 48)
-        self._spinner.set_hexpand(False)
-        self._spinner.set_vexpand(False)
-        self._spinner.set_halign(Gtk.Align.CENTER)
-        self._spinner.set_valign(Gtk.Align.CENTER)
-
         content_box = self.get_content_area()
         content_box.set_margin_left(8)
         content_box.set_margin_right(8)
@@ -136,126 +174,141 @@ class IconChooserDialog(Gtk.Dialog):
         self._filter_entry.connect("changed", self._filter_icons)
         filter_clear_button.connect("clicked", lambda button:
                                     self._filter_entry.set_text(""))
-        self._icon_box.connect("selected-children-changed",
-                              self._on_icon_selected)
+        self._icon_view.connect("selection-changed", self._on_icon_selected)
+        self._icon_view.connect("item-activated",
+                                self._on_icon_preview_selected)
+        self.connect("destroy", self._on_destroy)
 
-    def _create_icon_previews(self, icon_name_list, icon_size):
-        """Create icon previews to be placed in the dialog's icon box.
-        
-        Intended to be run in new thread. This only creates previews and adds
-        them to the icon flow box, but it will not show()/display them. This is
-        done by calling _display_icon_previews, which should be done in the
-        main thread via GLib.idle_add.
-        
-        :param icon_name_list: List of icon names to create previews for.
-        :param icon_size: Size to make icons within previews.
-        :return: None
-        """
-        for icon in icon_name_list:
-            flow_child = Gtk.FlowBoxChild()
-            flow_child.add(_IconPreview(icon, icon_size))
-            flow_child.connect("activate", self._on_icon_preview_selected)
-            GLib.idle_add(self._icon_box.insert, flow_child, -1)
-        GLib.idle_add(self._display_icon_previews)
+    def _set_up_renderers(self):
+        """Give the cell renderers a fixed size for the current icon size.
 
-    def _display_icon_previews(self):
-        """Display icons and clean up after _create_icon_previews is run.
+        With fixed sizes the icon view never needs to load an icon or lay out
+        its label to measure an item, so only visible items cost anything.
 
-        WARNING: This must be run from the main thread, however show_all can
-        take a noticeable amount of time, so the dialog will freeze momentarily
-        as this runs if there are many icons to display. This is not avoidable
-        to my knowledge.
-        
         :return: None
         """
-        self._icon_box_frame.remove(self._icon_box_frame.get_children()[0])
-        self._icon_box_frame.add(self._scroller)
-        self._spinner.stop()
-        self._scroller.show_all()
+        item_width = max(self._icon_size * 2, 72)
+        layout = self._icon_view.create_pango_layout("Xg")
+        line_height = layout.get_pixel_size()[1]
 
-        if self._filter_entry.get_text():
-            self._filter_icons(self._filter_entry)
-            self._filter_entry.set_position(len(self._filter_entry.get_text()))
-        else:
-            self._icon_box.show_all()
-
-        self._icon_context_combo.set_sensitive(True)
+        self._pixbuf_renderer.set_property(
+            "stock-size", _get_pixel_icon_size(self._icon_size))
+        self._pixbuf_renderer.set_fixed_size(item_width, self._icon_size)
+        self._text_renderer.set_property("wrap-width", item_width)
+        self._text_renderer.set_fixed_size(item_width, line_height * 2)
+        self._icon_view.set_item_width(item_width)
 
     def _filter_icons(self, entry):
-        """Filter icons based on filter term, used when filter term changes.
+        """Schedule filtering of icons, used when filter term changes.
+
+        Filtering is debounced so that typing a term only filters once the
+        user pauses.
+
+        :param entry: Text entry containing filter text.
+        :return: None
+        """
+        if self._filter_source is not None:
+            GLib.source_remove(self._filter_source)
+        self._filter_source = GLib.timeout_add(_FILTER_DELAY,
+                                               self._apply_filter)
+
+    def _apply_filter(self):
+        """Filter icons based on the current filter term.
 
         If use_regex is True, the provided string will be used as the pattern
         for a regex match, otherwise basic case-insensitive matching is used.
-        
-        :param entry: Text entry containing filter text.
+
+        :return: False, so the timeout is not repeated.
+        """
+        self._filter_source = None
+        self._filter_term = self._filter_entry.get_text()
+        try:
+            self._visible_icons = self._search_index.search(
+                self._filter_term, self._use_regex)
+        except re.error:
+            self._visible_icons = set()
+        self._icon_filter.refilter()
+        return False
+
+    def _is_icon_visible(self, model, tree_iter, data):
+        """Visibility function for the icon model filter.
+
+        :param model: The unfiltered icon store.
+        :param tree_iter: Iter of the row being checked.
+        :param data: Unused.
+        :return: Whether the icon matches the filter term.
+        """
+        return self._visible_icons is None or \
+            model.get_value(tree_iter, 2) in self._visible_icons
+
+    def _on_destroy(self, dialog):
+        """Cancel any pending filtering when the dialog is destroyed.
+
+        :param dialog: The dialog (self)
         :return: None
         """
-        self._filter_term = entry.get_text()
-        if self._filter_term == "":
-            for icon in self._icon_box.get_children():
-                icon.show()
-        else:
-            for icon in self._icon_box.get_children():
-                if self._use_regex:
-                    if re.search(self._filter_term, icon):
-                        icon.show()
-                    else:
-                        icon.hide()
-                else:
-                    name = icon.get_children()[0].get_name().lower()\
-                        .replace('-', ' ').replace('_', ' ')
-                    if self._filter_term.lower() in name:
-                        icon.show()
-                    else:
-                        icon.hide()
+        if self._filter_source is not None:
+            GLib.source_remove(self._filter_source)
+            self._filter_source = None
 
     def _on_context_changed(self, combobox):
         """When the context is changed, display the approprite icons.
-        
+
+        The icons are placed in a new, detached store which is then swapped
+        into the filter in one step.
+
         :param combobox: ComboBox used for context selection.
         :return: None
         """
         self._ok_button.set_sensitive(False)
         self._selected_icon = None
 
-        for child in self._icon_box.get_children():
-            child.destroy()
-
-        # Place a spinner in the icon section while icons are loaded.
-        self._icon_box_frame.remove(self._icon_box_frame.get_children()[0])
-        self._icon_box_frame.add(self._spinner)
-        self._spinner.start()
-        self._icon_context_combo.set_sensitive(False)
-        # Load icon previews for the new context asynchronously.
         selected_context = self._context_store.get_value(
                 self._icon_context_combo.get_active_iter(), 0)
-        current_icons = self._icon_theme.list_icons(selected_context)
-        current_icons.sort()
-        thread = Thread(target=self._create_icon_previews,
-                        args=(current_icons, self._icon_size))
-        thread.setDaemon(True)
-        thread.start()
+        current_icons = get_theme_cache(self._icon_theme).list_icons(
+            selected_context)
+
+        self._search_index = _IconSearchIndex(current_icons)
+        try:
+            self._visible_icons = self._search_index.search(
+                self._filter_entry.get_text(), self._use_regex)
+        except re.error:
+            self._visible_icons = set()
+
+        self._icon_store = Gtk.ListStore(str, str, int)
+        for index, icon in enumerate(current_icons):
+            self._icon_store.append(
+                [icon, icon.replace('-', ' ').replace('_', ' '), index])
+        self._icon_filter = self._icon_store.filter_new()
+        self._icon_filter.set_visible_func(self._is_icon_visible)
+        self._icon_view.set_model(self._icon_filter)
+
+        if self._filter_entry.get_text():
+            self._filter_entry.set_position(len(self._filter_entry.get_text()))
 
-    def _on_icon_preview_selected(self, preview):
+    def _on_icon_preview_selected(self, icon_view, path):
         """Emulate OK when an icon preview is activated.
-        
-        :param preview: The preview activated.
+
+        :param icon_view: IconView containing the activated icon.
+        :param path: Path of the icon activated.
         :return: None
         """
         self.response(1)
 
-    def _on_icon_selected(self, flowbox):
+    def _on_icon_selected(self, icon_view):
         """Sets the selected_icon property when the selection changes.
-        
-        :param flowbox: FlowBox in which selection changed.
+
+        :param icon_view: IconView in which selection changed.
         :return: None
         """
-        selection = flowbox.get_selected_children()
+        selection = icon_view.get_selected_items()
         if not selection:
             self._selected_icon = None
             self._ok_button.set_sensitive(False)
         else:
-            self._selected_icon = selection[0].get_children()[0].get_name()
+            model = icon_view.get_model()
+            self._selected_icon = model.get_value(
+                model.get_iter(selection[0]), 0)
             self._ok_button.set_sensitive(True)
 
     def get_icon_contexts(self):
@@ -303,15 +356,14 @@ class IconChooserDialog(Gtk.Dialog):
         :return: None
         """
         self._icon_theme = Gtk.IconTheme.get_default()
+        self._set_up_renderers()
         if self._icon_contexts:
             used_contexts = []
-            for context in self._icon_theme.list_contexts():
+            for context in get_theme_cache(self._icon_theme).list_contexts():
                 if context in self._icon_contexts:
                     used_contexts += [context]
-            used_contexts.sort()
         else:
-            used_contexts = self._icon_theme.list_contexts()
-            used_contexts.sort()
+            used_contexts = get_theme_cache(self._icon_theme).list_contexts()
 
         self._context_store.clear()
         for context in used_contexts:
@@ -570,8 +622,8 @@ class IconChooserComboBox(Gtk.ComboBox):
     Population of the combobox, done with the populate method, can take time
     and cause the UI to freeze if there are many icons to display. Therefore it
     is advised to limit the available icons by setting filter terms or context
-    filters before population. I've attempted to make this asynchronous so as
-    to avoid such delays but had no luck.
+    filters before population, or to use populate_async, which does not block
+    the UI.
     """
     def __init__(self):
         super().__init__()
@@ -579,6 +631,7 @@ class IconChooserComboBox(Gtk.ComboBox):
         self._icon_contexts = []
         self._filter_term = ""
         self._use_regex = False
+        self._populate_generation = 0
 
         pixbuf_renderer = Gtk.CellRendererPixbuf()
         pixbuf_renderer.set_alignment(0, 0.5)
@@ -625,41 +678,67 @@ class IconChooserComboBox(Gtk.ComboBox):
         """
         return self._use_regex
 
-    def populate(self):
-        """Populate the combo box with themed icons.
+    def _list_icons(self):
+        """List the icons of the allowed contexts.
 
-        This can take timeand cause the UI to freeze if there are many icons to
-        display. Therefore itis advised to limit the available icons by setting
-        filter terms or context filters before population. I've attempted to
-        make this asynchronous so as to avoid such delays but had no luck.
-        
-        :return: None
+        Must be run from the main thread, since Gtk.IconTheme is not thread
+        safe.
+
+        :return: List of icon names.
         """
         unfiltered_icons = []
-        icon_theme = Gtk.IconTheme.get_default()
+        theme_cache = get_theme_cache()
         if not self._icon_contexts:
-            for context in icon_theme.list_contexts():
-                unfiltered_icons += icon_theme.list_icons(context)
+            for context in theme_cache.list_contexts():
+                unfiltered_icons += theme_cache.list_icons(context)
         else:
-            for context in icon_theme.list_contexts():
+            for context in theme_cache.list_contexts():
                 if context not in self._icon_contexts:
                     continue
-                unfiltered_icons += icon_theme.list_icons(context)
+                unfiltered_icons += theme_cache.list_icons(context)
+        return unfiltered_icons
+
+    @staticmethod
+    def _filter_icon_list(icons, filter_term, use_regex):
+        """Filter a list of icon names by a filter term.
 
+        Does not touch any widgets, so it can be run in a separate thread.
+
+        :param icons: List of icon names to filter.
+        :param filter_term: String used for filtering icons by name.
+        :param use_regex: Whether the filter term is used as a regex pattern.
+        :return: List of icon names matching the filter term.
+        """
+        if not filter_term:
+            return list(icons)
         filtered_icons = []
-        if not self._filter_term:
-            for icon in unfiltered_icons:
-                filtered_icons += [icon]
+        if use_regex:
+            pattern = re.compile(filter_term)
+            for icon in icons:
+                if pattern.search(icon):
+                    filtered_icons += [icon]
         else:
-            for icon in unfiltered_icons:
-                if self._use_regex:
-                    if not re.search(self._filter_term, icon):
-                        continue
-                else:
-                    if not self._filter_term.lower() in \
-                            icon.lower().replace('-', ' ').replace('_', ' '):
-                        continue
-                filtered_icons += [icon]
+            filter_term = filter_term.lower()
+            for icon in icons:
+                if filter_term in \
+                        icon.lower().replace('-', ' ').replace('_', ' '):
+                    filtered_icons += [icon]
+        return filtered_icons
+
+    def populate(self):
+        """Populate the combo box with themed icons.
+
+        This can take time and cause the UI to freeze if there are many icons
+        to display. Therefore it is advised to limit the available icons by
+        setting filter terms or context filters before population, or to use
+        populate_async instead. Cancels any population started by
+        populate_async.
+
+        :return: None
+        """
+        self._populate_generation += 1
+        filtered_icons = self._filter_icon_list(
+            self._list_icons(), self._filter_term, self._use_regex)
 
         # This section can be slow with many icons to show()
         self._icon_store.clear()
@@ -669,6 +748,82 @@ class IconChooserComboBox(Gtk.ComboBox):
         self.set_active(0)
         self.show_all()
 
+    def populate_async(self, callback=None, time_budget=8):
+        """Populate the combo box with themed icons without blocking the UI.
+
+        Icons are filtered in a separate thread, then appended to a new,
+        detached store in chunks of at most time_budget milliseconds per main
+        loop iteration. Once complete the store replaces the current one with
+        a single set_model call. Calling populate or populate_async again
+        cancels a population in progress, and its callback is not called.
+
+        :param callback: Function called with the combo box once populated.
+        :param time_budget: Milliseconds of work allowed per chunk.
+        :return: None
+        """
+        self._populate_generation += 1
+        thread = Thread(target=self._filter_icons_async,
+                        args=(self._populate_generation, self._list_icons(),
+                              self._filter_term, self._use_regex, callback,
+                              time_budget))
+        thread.daemon = True
+        thread.start()
+
+    def _filter_icons_async(self, generation, icons, filter_term, use_regex,
+                            callback, time_budget):
+        """Filter icons for populate_async, run in a separate thread.
+
+        :param generation: Population this work belongs to.
+        :param icons: List of icon names to filter.
+        :param filter_term: String used for filtering icons by name.
+        :param use_regex: Whether the filter term is used as a regex pattern.
+        :param callback: Function called once populated, or None.
+        :param time_budget: Milliseconds of work allowed per chunk.
+        :return: None
+        """
+        try:
+            filtered_icons = self._filter_icon_list(icons, filter_term,
+                                                    use_regex)
+        except re.error:
+            filtered_icons = []
+        GLib.idle_add(self._fill_store, generation, iter(filtered_icons),
+                      None, callback, time_budget)
+
+    def _fill_store(self, generation, icons, store, callback, time_budget):
+        """Append one chunk of icons to a detached store for populate_async.
+
+        Reschedules itself until all icons are appended, then swaps the store
+        in. Must be run from the main thread.
+
+        :param generation: Population this work belongs to.
+        :param icons: Iterator over the icon names still to be appended.
+        :param store: Store being filled, or None to create it.
+        :param callback: Function called once populated, or None.
+        :param time_budget: Milliseconds of work allowed per chunk.
+        :return: False, the next chunk is scheduled separately.
+        """
+        if generation != self._populate_generation:
+            return False
+        if store is None:
+            store = Gtk.ListStore(str, str)
+            store.append(["gtk-search", "(Choose An Icon)"])
+
+        deadline = time.monotonic() + time_budget / 1000
+        for icon in icons:
+            store.append([icon, icon])
+            if time.monotonic() >= deadline:
+                GLib.idle_add(self._fill_store, generation, icons, store,
+                              callback, time_budget)
+                return False
+
+        self._icon_store = store
+        self.set_model(store)
+        self.set_active(0)
+        self.show_all()
+        if callback is not None:
+            callback(self)
+        return False
+
     def set_icon_contexts(self, context_list):
         """Set the list of icon contexts from which selection is allowed.
 
@@ -717,39 +872,114 @@ class IconChooserComboBox(Gtk.ComboBox):
         self._use_regex = use_regex
 
 
-class _IconPreview(Gtk.Box):
-    """Creates a preview box for icons containing the icon and its name."""
-    def __init__(self, name, size):
-        super().__init__()
-        self.set_orientation(Gtk.Orientation.VERTICAL)
-        self.set_spacing(2)
+class _IconThemeCache:
+    """Sorted icon contexts and icon names of an icon theme.
 
-        self._icon_name = name
-        self._display_name = name.replace('-', ' ').replace('_', ' ')
-        self._icon_size = size
+    Listings are made on first use and kept until the theme emits "changed".
+    Lists are returned as tuples since they are shared between widgets.
+    """
+    def __init__(self, icon_theme):
+        self._icon_theme = icon_theme
+        self._contexts = None
+        self._icons = {}
+        icon_theme.connect("changed", self._on_theme_changed)
 
-        icon = Gtk.Image.new_from_icon_name(name, Gtk.IconSize.DIALOG)
-        # Gtk.Image.new_from_icon_name seems to sometimes ignore the set size,
-        #   leading to inconsistent icon sizes. Solution is to force a size
-        #   using set_pixel_size.
-        icon.set_pixel_size(size)
-        icon.set_tooltip_text(self._icon_name)
-
-        label = Gtk.Label(self._display_name)
-        label.set_justify(Gtk.Justification.CENTER)
-        label.set_lines(3)
-        label.set_line_wrap(True)
-        label.set_line_wrap_mode(Pango.WrapMode.WORD_CHAR)
-        label.set_max_width_chars(8)
-        label.set_ellipsize(Pango.EllipsizeMode.END)
-        label.set_yalign(0.5)
-
-        self.pack_start(icon, False, False, 0)
-        self.pack_start(label, False, False, 0)
-
-    def get_name(self):
-        """Get the name of the icon.
-        
-        :return: Name of the icon.
+    def _on_theme_changed(self, icon_theme):
+        """Drop all listings when the theme changes.
+
+        :param icon_theme: The Gtk.IconTheme which changed.
+        :return: None
+        """
+        self._contexts = None
+        self._icons = {}
+
+    def list_contexts(self):
+        """Get the theme's icon contexts.
+
+        :return: Sorted tuple of context names.
+        """
+        if self._contexts is None:
+            self._contexts = tuple(sorted(self._icon_theme.list_contexts()))
+        return self._contexts
+
+    def list_icons(self, context=None):
+        """Get the names of the theme's icons in a context.
+
+        :param context: Context to list icons from, or None for all icons.
+        :return: Sorted tuple of icon names.
         """
-        return self._icon_name
+        icons = self._icons.get(context)
+        if icons is None:
+            icons = tuple(sorted(self._icon_theme.list_icons(context)))
+            self._icons[context] = icons
+        return icons
+
+
+class _IconSearchIndex:
+    """Index of icon names used to filter icons as a term is typed.
+
+    Names are normalized once. Plain terms are looked up through a trigram
+    index, and a term which extends the previous one is only checked against
+    the previous matches, so results narrow incrementally while typing. Regex
+    terms are compiled once per term.
+    """
+    def __init__(self, names):
+        self._names = names
+        self._normalized = [name.lower().replace('-', ' ').replace('_', ' ')
+                            for name in names]
+        self._trigrams = {}
+        for index, name in enumerate(self._normalized):
+            for start in range(len(name) - 2):
+                self._trigrams.setdefault(name[start:start + 3],
+                                          set()).add(index)
+        self._last_term = None
+        self._last_matches = None
+        self._pattern = (None, None)
+
+    def search(self, term, use_regex=False):
+        """Find the icons matching a filter term.
+
+        :param term: Filter term, or a regex pattern if use_regex is True.
+        :param use_regex: Whether the term is used as a regex pattern.
+        :return: Set of matching name indices, or None if all names match.
+        """
+        if term == "":
+            return None
+        if use_regex:
+            if self._pattern[0] != term:
+                self._pattern = (term, re.compile(term))
+            pattern = self._pattern[1]
+            return {index for index, name in enumerate(self._names)
+                    if pattern.search(name)}
+
+        term = term.lower()
+        if self._last_term is not None and self._last_term in term:
+            candidates = self._last_matches
+        elif len(term) >= 3:
+            trigram_sets = [self._trigrams.get(term[start:start + 3], set())
+                            for start in range(len(term) - 2)]
+            candidates = set.intersection(*sorted(trigram_sets, key=len))
+        else:
+            candidates = range(len(self._names))
+        matches = {index for index in candidates
+                   if term in self._normalized[index]}
+
+        self._last_term = term
+        self._last_matches = matches
+        return matches
+
+
+def _get_pixel_icon_size(pixels):
+    """Get a Gtk.IconSize which renders icons at the given pixel size.
+
+    Cell renderers only accept an icon size rather than a pixel size, so a
+    named size is registered for each pixel size the first time it is used.
+
+    :param pixels: Size of the icon, in pixels.
+    :return: Gtk.IconSize value for the given size.
+    """
+    name = "themed-icon-chooser-%d" % pixels
+    icon_size = Gtk.icon_size_from_name(name)
+    if icon_size == Gtk.IconSize.INVALID:
+        icon_size = Gtk.icon_size_register(name, pixels, pixels)
+    return icon_size
@@ -0,0 +1,241 @@
+#!/usr/bin/python3
+# Komut satırı arayüzü.
+# Web uygulamalarını pencere açmadan listeler, oluşturur, düzenler ve siler; çıktı JSON'dur.
+# Gtk yüklenmez, böylece binlerce işlem tek bir çağrıda hızlıca yapılabilir.
+import argparse
+import json
+import os
+import sys
+
+from common import QuicklyWebManager, LauncherTransaction, WebAppLauncher, APPS_DIR, get_browser_by_name, load_manifest, dedupe_profiles
+
+DEFAULT_ICON = "web-manager"
+DEFAULT_CATEGORY = "Network"
+
+class CommandError(Exception):
+    pass
+
+def webapp_to_dict(webapp):
+    return {"codename": webapp.codename, "path": webapp.path, "name": webapp.name, "url": webapp.url,
+            "icon": webapp.icon, "category": webapp.category, "exec": webapp.exec,
+            "browser": webapp.browser, "isolated": webapp.isolated, "navbar": webapp.navbar}
+
+def browser_to_dict(browser):
+    return {"name": browser.name, "type": browser.browser_type, "exec": browser.exec_path,
+            "installed": os.path.exists(browser.test_path)}
+
+class WebAppCommands():
+
+    def __init__(self):
+        self.manager = QuicklyWebManager()
+        self.browsers = None
+        # Toplu işlemlerde başlatıcılar tek bir işlemle yayımlanır
+        self.transaction = None
+
+    # Kod adı ya da başlatıcı yolu ile web uygulamasını bulur
+    def find_webapp(self, target):
+        path = target
+        if os.sep not in target:
+            path = os.path.join(APPS_DIR, "webapp-%s.desktop" % target)
+        if self.transaction is not None and self.transaction.get_path(path) != path:
+            # Bu toplu işlemde oluşturulmuş ya da düzenlenmiş, henüz yayımlanmamış başlatıcı
+            codename = os.path.basename(path).replace("webapp-", "").replace(".desktop", "")
+            webapp = WebAppLauncher(self.transaction.get_path(path), codename)
+            webapp.path = path
+        elif self.transaction is not None and path in self.transaction.removals:
+            webapp = None
+        else:
+            webapp = self.manager.load_webapp(path) if os.path.exists(path) else None
+        if webapp is None:
+            raise CommandError("web app not found: %s" % target)
+        return webapp
+
+    # Tarayıcı adına göre (büyük/küçük harf duyarsız) kurulu tarayıcıyı bulur, ad yoksa ilk kurulu tarayıcı
+    def find_browser(self, name=None):
+        if self.browsers is None:
+            self.browsers = [browser for browser in self.manager.get_supported_browsers() if os.path.exists(browser.test_path)]
+        try:
+            return get_browser_by_name(self.browsers, name)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def list(self):
+        return [webapp_to_dict(webapp) for webapp in self.manager.get_webapps()]
+
+    def browsers_list(self):
+        return [browser_to_dict(browser) for browser in self.manager.get_supported_browsers()]
+
+    def create(self, name, url, icon=DEFAULT_ICON, category=DEFAULT_CATEGORY, browser=None, isolate_profile=True, navbar=False):
+        if not name or not url:
+            raise CommandError("name and url are required")
+        path = self.manager.create_webapp(name, url, icon, category, self.find_browser(browser), isolate_profile, navbar, self.transaction)
+        return webapp_to_dict(self.find_webapp(path))
+
+    # Adres başlatıcının Exec satırına ve profiline bağlı olduğundan düzenlenemez
+    def edit(self, target, name=None, icon=None, category=None, url=None):
+        webapp = self.find_webapp(target)
+        if url is not None and url != webapp.url:
+            raise CommandError("the url of a web app cannot be edited, delete and create it again")
+        self.manager.edit_webapp(webapp.path,
+                                 name if name is not None else webapp.name,
+                                 webapp.url,
+                                 icon if icon is not None else webapp.icon,
+                                 category if category is not None else webapp.category,
+                                 self.transaction)
+        return webapp_to_dict(self.find_webapp(webapp.path))
+
+    def delete(self, target):
+        webapp = self.find_webapp(target)
+        self.manager.delete_webbapp(webapp, transaction=self.transaction)
+        return {"codename": webapp.codename, "path": webapp.path, "deleted": True}
+
+    # Önce tüm hedefler bulunur, böylece biri yoksa hiçbiri silinmez.
+    # Başlatıcılar birlikte kaldırılır ve menüler bir kez yenilenir.
+    def delete_all(self, targets):
+        webapps = [self.find_webapp(target) for target in targets]
+        results = []
+        with LauncherTransaction() as self.transaction:
+            for webapp in webapps:
+                self.manager.delete_webbapp(webapp, transaction=self.transaction)
+                results.append({"codename": webapp.codename, "path": webapp.path, "deleted": True})
+        self.transaction = None
+        return results
+
+    # Tek bir toplu işlem: {"op": "create" | "edit" | "delete" | "list" | "browsers", ...}
+    def run_operation(self, operation):
+        operation = dict(operation)
+        op = operation.pop("op", None)
+        if op == "create":
+            return self.create(**operation)
+        if op == "edit":
+            return self.edit(**operation)
+        if op == "delete":
+            return self.delete(**operation)
+        if op == "list":
+            return self.list()
+        if op == "browsers":
+            return self.browsers_list()
+        raise CommandError("unknown operation: %s" % op)
+
+    # İşlemler bir JSON dizisi ya da satır başına bir JSON nesnesi olarak okunur.
+    # Hatalı bir işlem diğerlerini durdurmaz, sonucu "error" olarak raporlanır.
+    def batch(self, stream):
+        text = stream.read()
+        if text.lstrip().startswith("["):
+            operations = json.loads(text)
+        else:
+            operations = [json.loads(line) for line in text.splitlines() if line.strip()]
+        results = []
+        with LauncherTransaction() as self.transaction:
+            for operation in operations:
+                try:
+                    results.append({"ok": True, "result": self.run_operation(operation)})
+                except (CommandError, TypeError, OSError) as e:
+                    results.append({"ok": False, "error": str(e)})
+        self.transaction = None
+        return results
+
+    def apply(self, manifest_path, prune=False, dry_run=False):
+        entries = load_manifest(manifest_path)
+        if dry_run:
+            plan = self.manager.plan_manifest(entries, prune)
+            return {action: [webapp.name if entry is None else entry["name"] for webapp, entry in items]
+                    for action, items in plan.items()}
+        return self.manager.apply_manifest(entries, prune)
+
+    def dedupe(self, dry_run=False):
+        return dedupe_profiles(dry_run)
+
+    def gc(self, delete=False, grace_period=None):
+        if delete:
+            # Yarıda kalmış silmeleri de tamamlayalım
+            self.manager.purge_trash()
+        if grace_period is None:
+            return self.manager.collect_orphan_profiles(dry_run=not delete)
+        return self.manager.collect_orphan_profiles(grace_period, dry_run=not delete)
+
+    def close(self):
+        # Toplu işlemlerde dizin her başlatıcıdan sonra değil, bir kez yazılır
+        self.manager.index.save()
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="web-manager", description="Manage web apps without starting the window.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="list web apps")
+    subparsers.add_parser("browsers", help="list supported browsers")
+
+    create = subparsers.add_parser("create", help="create a web app")
+    create.add_argument("--name", required=True)
+    create.add_argument("--url", required=True)
+    create.add_argument("--icon", default=DEFAULT_ICON)
+    create.add_argument("--category", default=DEFAULT_CATEGORY)
+    create.add_argument("--browser", help="browser name, see 'browsers' (default: first installed)")
+    create.add_argument("--no-isolate", dest="isolate_profile", action="store_false", help="share the browser profile")
+    create.add_argument("--navbar", action="store_true", help="show the navigation bar (Firefox)")
+
+    edit = subparsers.add_parser("edit", help="edit a web app")
+    edit.add_argument("target", help="codename or launcher path")
+    edit.add_argument("--name")
+    edit.add_argument("--icon")
+    edit.add_argument("--category")
+
+    delete = subparsers.add_parser("delete", help="delete web apps")
+    delete.add_argument("targets", nargs="+", help="codenames or launcher paths")
+
+    batch = subparsers.add_parser("batch", help="run JSON operations from a file or stdin")
+    batch.add_argument("file", nargs="?", help="JSON array or JSON lines file (default: stdin)")
+
+    apply = subparsers.add_parser("apply", help="create, update or delete web apps to match a JSON or YAML manifest")
+    apply.add_argument("manifest", help="list of web apps with name, url, icon, category, browser, isolation and navbar")
+    apply.add_argument("--prune", action="store_true", help="delete web apps which are not in the manifest")
+    apply.add_argument("--dry-run", action="store_true", help="only show what would change")
+
+    dedupe = subparsers.add_parser("dedupe", help="share the data of identical files in browser profiles")
+    dedupe.add_argument("--dry-run", action="store_true", help="only report how much space would be saved")
+
+    gc = subparsers.add_parser("gc", help="list browser profiles which no web app uses")
+    gc.add_argument("--delete", action="store_true", help="delete the listed profiles")
+    gc.add_argument("--grace-period", type=int, help="ignore profiles changed within this many seconds (default: one day)")
+
+    return parser
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    commands = WebAppCommands()
+    try:
+        if args.command == "list":
+            result = commands.list()
+        elif args.command == "browsers":
+            result = commands.browsers_list()
+        elif args.command == "create":
+            result = commands.create(args.name, args.url, args.icon, args.category, args.browser, args.isolate_profile, args.navbar)
+        elif args.command == "edit":
+            result = commands.edit(args.target, args.name, args.icon, args.category)
+        elif args.command == "delete":
+            result = commands.delete_all(args.targets)
+        elif args.command == "apply":
+            result = commands.apply(args.manifest, args.prune, args.dry_run)
+        elif args.command == "dedupe":
+            result = commands.dedupe(args.dry_run)
+        elif args.command == "gc":
+            result = commands.gc(args.delete, args.grace_period)
+        elif args.command == "batch":
+            if args.file is None:
+                result = commands.batch(sys.stdin)
+            else:
+                with open(args.file) as batch_file:
+                    result = commands.batch(batch_file)
+    except (CommandError, OSError, ValueError) as e:
+        json.dump({"error": str(e)}, sys.stderr)
+        sys.stderr.write("\n")
+        return 1
+    finally:
+        commands.close()
+
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
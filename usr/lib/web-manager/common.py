@@ -1,15 +1,23 @@
 #!/usr/bin/python3
+import concurrent.futures
 import configparser
+import errno
+import fcntl
 import gettext
-import gi
+import hashlib
+import json
 import locale
 import os
+import re
 import shutil
 import string
+import subprocess
+import tempfile
 import threading
+import time
 import traceback
-from gi.repository import GObject
 from random import choice
+from stat import S_ISDIR
 
 
 #Arka planda işleri yürütmek için dekoratör olarak kullanılır
@@ -21,8 +29,10 @@ def _async(func):
         return thread
     return wrapper
 #Ana döngüdeki şeyleri başka bir iş parçacığından çalıştırmak için bir dekoratör olarak kullanılır
+#GObject ilk çağrıda yüklenir, böylece komut satırı arayüzü gi yüklemeden çalışır
 def idle(func):
     def wrapper(*args):
+        from gi.repository import GObject
         GObject.idle_add(func, *args)
     return wrapper
 
@@ -42,7 +52,33 @@ FIREFOX_FLATPAK_PROFILES_DIR = os.path.expanduser("~/.var/app/org.mozilla.firefo
 EPIPHANY_PROFILES_DIR = os.path.join(ICE_DIR, "epiphany")
 FALKON_PROFILES_DIR = os.path.join(ICE_DIR, "falkon")
 ICONS_DIR = os.path.join(ICE_DIR, "icons")
-BROWSER_TYPE_FIREFOX, BROWSER_TYPE_FIREFOX_FLATPAK, BROWSER_TYPE_CHROMIUM, BROWSER_TYPE_EPIPHANY, BROWSER_TYPE_FALKON = range(4)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), APP)
+THUMBNAILS_DIR = os.path.join(CACHE_DIR, "thumbnails")
+FAVICONS_DIR = os.path.join(CACHE_DIR, "favicons")
+LAUNCHER_INDEX_FILE = os.path.join(ICE_DIR, "launchers.json")
+LAUNCHER_INDEX_VERSION = 2
+# Başlatıcılar uygulama dizininde değil, burada hazırlanır; masaüstü ortamları yarım dosyaları görmez
+STAGING_PREFIX = ".launchers-"
+# Bundan eski hazırlık dizinleri yarıda kalmış (çöken ya da öldürülen) işlemlerdendir (saniye)
+STAGING_MAX_AGE = 60 * 60
+# Boş bir başlatıcı kodu bulmak için en fazla deneme sayısı
+CODENAME_ATTEMPTS = 100
+# Manifest uygulanırken profilleri oluşturan iş parçacığı sayısı
+MANIFEST_WORKERS = 8
+BROWSER_TYPE_FIREFOX, BROWSER_TYPE_FIREFOX_FLATPAK, BROWSER_TYPE_CHROMIUM, BROWSER_TYPE_EPIPHANY, BROWSER_TYPE_FALKON = range(5)
+# Profil dizinleri ve profil adlarının kod adından önceki öneki
+PROFILE_BASES = [(PROFILES_DIR, ""), (FIREFOX_PROFILES_DIR, ""), (FIREFOX_FLATPAK_PROFILES_DIR, ""),
+                 (EPIPHANY_PROFILES_DIR, "epiphany-"), (FALKON_PROFILES_DIR, "")]
+# Başlatıcısı olmayan profiller bu süreden (saniye) eskiyse artık sayılır, yeni oluşturulanlar korunur
+GC_GRACE_PERIOD = 24 * 60 * 60
+# Pencere açılırken artık profiller daha temkinli bir süreyle arka planda temizlenir
+GC_STARTUP_GRACE_PERIOD = 7 * 24 * 60 * 60
+GC_WORKERS = 8
+# Silinen profiller önce aynı dizinde bu önekle yeniden adlandırılır, sonra arka planda silinir
+TRASH_PREFIX = ".trash-"
+
+# Aynı anda tek bir silme işi çalışsın
+_purge_lock = threading.Lock()
 
 class Browser():
 
@@ -55,7 +91,10 @@ class Browser():
 #Uygulama menüsü öğesi (path, name, icon..etc.)
 class WebAppLauncher():
 
-    def __init__(self, path, codename):
+    # Başlatıcı dizininde saklanan alanlar
+    INDEX_FIELDS = ["name", "icon", "is_valid", "exec", "category", "url", "browser", "isolated", "navbar"]
+
+    def __init__(self, path, codename, fields=None):
         self.path = path
         self.codename = codename
         self.name = None
@@ -64,6 +103,16 @@ class WebAppLauncher():
         self.exec = None
         self.category = None
         self.url = ""
+        # Eski başlatıcılarda bu bilgiler yok, None bilinmiyor demektir
+        self.browser = None
+        self.isolated = None
+        self.navbar = None
+
+        if fields is not None:
+            # Değerler dizinden geliyor, dosyayı yeniden ayrıştırmaya gerek yok
+            for field in self.INDEX_FIELDS:
+                setattr(self, field, fields.get(field, getattr(self, field)))
+            return
 
         is_webapp = False
         with open(path) as desktop_file:
@@ -95,9 +144,238 @@ class WebAppLauncher():
                     self.url = line.replace("X-WebApp-URL=", "")
                     continue
 
+                if "X-WebApp-Browser=" in line:
+                    self.browser = line.replace("X-WebApp-Browser=", "")
+                    continue
+
+                if "X-WebApp-Isolated=" in line:
+                    self.isolated = line.replace("X-WebApp-Isolated=", "") == "true"
+                    continue
+
+                if "X-WebApp-Navbar=" in line:
+                    self.navbar = line.replace("X-WebApp-Navbar=", "") == "true"
+                    continue
+
         if is_webapp and self.name != None and self.icon != None:
             self.is_valid = True
 
+    def get_index_fields(self):
+        return {field: getattr(self, field) for field in self.INDEX_FIELDS}
+
+#Başlatıcıların diskteki dizini.
+#Her .desktop dosyası (path, mtime, size, inode) ile anahtarlanır, böylece
+#yalnızca değişen dosyalar yeniden ayrıştırılır ve soğuk başlangıçta tüm liste tek bir okumayla yüklenir.
+class LauncherIndex():
+
+    def __init__(self, path=LAUNCHER_INDEX_FILE):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as index_file:
+                data = json.load(index_file)
+            if data.get("version") == LAUNCHER_INDEX_VERSION:
+                self.entries = data.get("launchers", {})
+        except FileNotFoundError:
+            pass
+        except Exception:
+            print("Could not read launcher index", self.path)
+            traceback.print_exc()
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Yarım yazılmış bir dizin bırakmamak için geçici dosyaya yazıp yerine taşıyalım
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as index_file:
+                json.dump({"version": LAUNCHER_INDEX_VERSION, "launchers": self.entries}, index_file)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception:
+            print("Could not write launcher index", self.path)
+            traceback.print_exc()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def get_key(stat):
+        return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+    def get(self, path, stat):
+        entry = self.entries.get(path)
+        if entry is not None and entry["key"] == self.get_key(stat):
+            return entry["fields"]
+        return None
+
+    def set(self, path, stat, fields):
+        self.entries[path] = {"key": self.get_key(stat), "fields": fields}
+        self.dirty = True
+
+    def remove(self, path):
+        if self.entries.pop(path, None) is not None:
+            self.dirty = True
+
+    # Artık diskte olmayan başlatıcıları dizinden çıkarır
+    def prune(self, paths):
+        for path in list(self.entries):
+            if path not in paths:
+                self.remove(path)
+
+# Başlatıcı yazma işlemi.
+# Başlatıcılar ICE_DIR içindeki geçici bir dizinde yazılır, commit ile uygulama dizinine
+# tek tek rename edilir ve refresh ise tüm grup için menüler bir kez yenilenir. Silmeler de commit'e kadar bekler.
+# Yenileme alt süreç çalıştırdığından yalnızca toplu işlemlerde (komut satırı, manifest) kullanılır;
+# tek başlatıcı değişikliklerini masaüstünün dizin izleyicisi zaten görür.
+# with bloğu hatasız biterse commit, hata olursa rollback yapılır.
+class LauncherTransaction():
+
+    def __init__(self, refresh=True):
+        self.refresh = refresh
+        self.staging_dir = None
+        self.staged = {}
+        # Bu işlemde oluşturulan başlatıcılar; bunlar var olan bir dosyanın üzerine yazılmaz
+        self.new_paths = set()
+        self.removals = []
+        self.changed = False
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    # Uygulama dizinindeki bir başlatıcı yolu için hazırlık yolunu döndürür
+    def stage(self, path):
+        with self.lock:
+            if self.staging_dir is None:
+                self.staging_dir = tempfile.mkdtemp(dir=ICE_DIR, prefix=STAGING_PREFIX)
+            staged_path = os.path.join(self.staging_dir, os.path.basename(path))
+            self.staged[path] = staged_path
+            if path in self.removals:
+                self.removals.remove(path)
+            return staged_path
+
+    # Yeni bir başlatıcı için dosyayı yalnızca hiçbir yerde yoksa oluşturur, yoksa FileExistsError
+    def reserve(self, path):
+        with self.lock:
+            if path in self.staged or os.path.lexists(path):
+                raise FileExistsError(path)
+        desktop_file = open(self.stage(path), 'x')
+        with self.lock:
+            self.new_paths.add(path)
+        return desktop_file
+
+    # Başlatıcının en güncel hali: hazırlanmışsa hazırlık yolu, değilse kendisi
+    def get_path(self, path):
+        return self.staged.get(path, path)
+
+    def remove(self, path):
+        with self.lock:
+            staged_path = self.staged.pop(path, None)
+            if staged_path is not None and os.path.lexists(staged_path):
+                os.remove(staged_path)
+            self.removals.append(path)
+
+    # Uygulama dizini dışındaki (Epiphany profilindeki) bir başlatıcı değişti, menüler yenilensin
+    def touch(self):
+        self.changed = True
+
+    # Yeni başlatıcı sabit bağlantıyla yayımlanır, aynı adda bir dosya varsa (başka bir süreç aynı
+    # kod adını bu arada kullandıysa) FileExistsError verir. Düzenlenen başlatıcı rename ile değiştirilir.
+    @staticmethod
+    def publish(staged_path, path, new):
+        if new:
+            os.link(staged_path, path, follow_symlinks=False)
+            os.unlink(staged_path)
+        else:
+            os.replace(staged_path, path)
+
+    def commit(self):
+        with self.lock:
+            conflicts = []
+            try:
+                for path, staged_path in self.staged.items():
+                    new = path in self.new_paths
+                    try:
+                        try:
+                            self.publish(staged_path, path, new)
+                        except OSError as e:
+                            if e.errno != errno.EXDEV:
+                                raise
+                            # Farklı dosya sistemi: gizli bir geçici dosyaya kopyalayıp oradan yayımlayalım
+                            tmp_path = os.path.join(os.path.dirname(path), ".%s.%s.tmp" % (os.path.basename(path), os.urandom(4).hex()))
+                            try:
+                                if os.path.islink(staged_path):
+                                    os.symlink(os.readlink(staged_path), tmp_path)
+                                else:
+                                    shutil.copy2(staged_path, tmp_path)
+                                self.publish(tmp_path, path, new)
+                            finally:
+                                if os.path.lexists(tmp_path):
+                                    os.unlink(tmp_path)
+                    except FileExistsError:
+                        conflicts.append(path)
+                        continue
+                    self.changed = True
+                for path in self.removals:
+                    if os.path.lexists(path):
+                        os.remove(path)
+                        self.changed = True
+            finally:
+                self.staged = {}
+                self.new_paths = set()
+                self.removals = []
+                self.cleanup()
+            if self.changed and self.refresh:
+                refresh_desktop_menus()
+            self.changed = False
+            if conflicts:
+                raise FileExistsError(errno.EEXIST, "another process created these launchers meanwhile", ", ".join(conflicts))
+
+    def rollback(self):
+        with self.lock:
+            self.staged = {}
+            self.new_paths = set()
+            self.removals = []
+            self.changed = False
+            self.cleanup()
+
+    def cleanup(self):
+        if self.staging_dir is not None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            self.staging_dir = None
+
+# Çöken ya da öldürülen işlemlerden kalan hazırlık dizinlerini siler.
+# Devam eden bir işlemin dizini her başlatıcıda değiştiğinden yeni kalır ve silinmez.
+def clean_staging_dirs():
+    oldest = time.time() - STAGING_MAX_AGE
+    try:
+        with os.scandir(ICE_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith(STAGING_PREFIX) and entry.is_dir(follow_symlinks=False) and \
+                        entry.stat(follow_symlinks=False).st_mtime < oldest:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+    except OSError as e:
+        print(e)
+
+# Masaüstü dosyası veritabanını ve menüleri yeniler (araçlar kuruluysa)
+def refresh_desktop_menus():
+    for command in [["update-desktop-database", "-q", APPS_DIR], ["xdg-desktop-menu", "forceupdate"]]:
+        if shutil.which(command[0]) is None:
+            continue
+        try:
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(e)
+
 #backend
 #Yüklenecek yardımcı fonksiyonlar içerir,
 #web uygulamalarını kaydet ve sil.
@@ -107,24 +385,54 @@ class QuicklyWebManager():
         for directory in [ICE_DIR, APPS_DIR, PROFILES_DIR, FIREFOX_PROFILES_DIR, FIREFOX_FLATPAK_PROFILES_DIR, ICONS_DIR, EPIPHANY_PROFILES_DIR, FALKON_PROFILES_DIR]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
+        self.index = LauncherIndex()
+        clean_staging_dirs()
 
     def get_webapps(self):
         webapps = []
-        for filename in os.listdir(APPS_DIR):
-            if filename.startswith("webapp-") and filename.endswith(".desktop"):
-                path = os.path.join(APPS_DIR, filename)
-                codename = filename.replace("webapp-", "").replace(".desktop", "")
-                if not os.path.isdir(path):
-                    try:
-                        webapp = WebAppLauncher(path, codename)
-                        if webapp.is_valid:
-                            webapps.append(webapp)
-                    except Exception:
-                        print("Could not create webapp for path", path)
-                        traceback.print_exc()
+        paths = set()
+        with os.scandir(APPS_DIR) as entries:
+            for entry in entries:
+                filename = entry.name
+                if filename.startswith("webapp-") and filename.endswith(".desktop"):
+                    paths.add(entry.path)
+                    webapp = self.load_webapp(entry.path, entry)
+                    if webapp is not None and webapp.is_valid:
+                        webapps.append(webapp)
 
+        self.index.prune(paths)
+        self.index.save()
         return (webapps)
 
+    # Diskteki tek bir başlatıcıyı yeniden okur, silinmişse None döner
+    def get_webapp(self, path):
+        webapp = None
+        if os.path.exists(path):
+            webapp = self.load_webapp(path)
+        else:
+            self.index.remove(path)
+        self.index.save()
+        return webapp
+
+    # Tek bir başlatıcıyı yükler, dosya değişmediyse dizindeki değerleri kullanır
+    def load_webapp(self, path, entry=None):
+        codename = os.path.basename(path).replace("webapp-", "").replace(".desktop", "")
+        try:
+            # Epiphany başlatıcıları sembolik link, hedefin bilgilerini kullanalım
+            stat = entry.stat() if entry is not None else os.stat(path)
+            if S_ISDIR(stat.st_mode):
+                return None
+            fields = self.index.get(path, stat)
+            if fields is not None:
+                return WebAppLauncher(path, codename, fields)
+            webapp = WebAppLauncher(path, codename)
+            self.index.set(path, stat, webapp.get_index_fields())
+            return webapp
+        except Exception:
+            print("Could not create webapp for path", path)
+            traceback.print_exc()
+            return None
+
     def get_supported_browsers(self):
         browsers = []
         # tür, ad, yürütme, test
@@ -143,22 +451,164 @@ class QuicklyWebManager():
         browsers.append(Browser(BROWSER_TYPE_CHROMIUM, "Ungoogled Chromium (Flatpak)", "/var/lib/flatpak/exports/bin/com.github.Eloston.UngoogledChromium", "/var/lib/flatpak/exports/bin/com.github.Eloston.UngoogledChromium"))
         browsers.append(Browser(BROWSER_TYPE_CHROMIUM, "Chromium (Flatpak)", "/var/lib/flatpak/exports/bin/org.chromium.Chromium", "/var/lib/flatpak/exports/bin/org.chromium.Chromium"))
         browsers.append(Browser(BROWSER_TYPE_FALKON, "Falkon", "falkon", "/usr/bin/falkon"))
-	return browsers
+        return browsers
 
-    def delete_webbapp(self, webapp):
-        shutil.rmtree(os.path.join(FIREFOX_PROFILES_DIR, webapp.codename), ignore_errors=True)
-        shutil.rmtree(os.path.join(EPIPHANY_PROFILES_DIR, "/epiphany-%s" % webapp.codename), ignore_errors=True)
-        shutil.rmtree(os.path.join(PROFILES_DIR, webapp.codename), ignore_errors=True)
-        if os.path.exists(webapp.path):
+    # Başlatıcıyı siler ve profilleri hemen çöpe taşır; asıl silme purge ise hemen,
+    # değilse purge_trash_in_background ile arka planda yapılır. Çöpe taşınanları döndürür.
+    # transaction verilirse başlatıcı commit ile silinir.
+    def delete_webbapp(self, webapp, purge=True, transaction=None):
+        trash = self.move_profiles_to_trash(webapp.codename)
+        if transaction is not None:
+            transaction.remove(webapp.path)
+        elif os.path.lexists(webapp.path):
             os.remove(webapp.path)
+        if purge:
+            self.purge_trash(trash)
+        return trash
+
+    # Profil dizinlerini aynı dosya sisteminde gizli bir ada taşır, bu tek bir rename işlemidir
+    def move_profiles_to_trash(self, codename):
+        trash = []
+        for profiles_dir, prefix in PROFILE_BASES:
+            profile_path = os.path.join(profiles_dir, prefix + codename)
+            if not os.path.isdir(profile_path):
+                continue
+            trash_path = os.path.join(profiles_dir, "%s%s%s-%s" % (TRASH_PREFIX, prefix, codename, os.urandom(4).hex()))
+            try:
+                os.rename(profile_path, trash_path)
+                trash.append(trash_path)
+            except OSError as e:
+                print(e)
+                shutil.rmtree(profile_path, ignore_errors=True)
+        return trash
+
+    # Önceki oturumlardan silinmeden kalan çöp dizinleri
+    def get_trash(self):
+        trash = []
+        for profiles_dir, prefix in PROFILE_BASES:
+            try:
+                with os.scandir(profiles_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(TRASH_PREFIX) and entry.is_dir(follow_symlinks=False):
+                            trash.append(entry.path)
+            except OSError:
+                continue
+        return trash
+
+    # Çöpteki dizinleri siler, paths verilmezse tüm çöpü (yarıda kalan silmeler dahil).
+    # callback(kalan, toplam) her dizinden sonra, çöp boşsa bir kez çağrılır.
+    def purge_trash(self, paths=None, callback=None):
+        with _purge_lock:
+            if paths is None:
+                paths = self.get_trash()
+            for index, path in enumerate(paths):
+                shutil.rmtree(path, ignore_errors=True)
+                if callback is not None:
+                    callback(len(paths) - index - 1, len(paths))
+            if callback is not None and not paths:
+                callback(0, 0)
+
+    @_async
+    def purge_trash_in_background(self, paths=None, callback=None):
+        try:
+            self.purge_trash(paths, callback)
+        except Exception as e:
+            print(e)
+
+    # Başlatıcı dizinindeki tüm web uygulaması kod adları (geçersiz başlatıcılar dahil)
+    def get_webapp_codenames(self):
+        codenames = set()
+        with os.scandir(APPS_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith("webapp-") and entry.name.endswith(".desktop"):
+                    codenames.add(entry.name[len("webapp-"):-len(".desktop")])
+        return codenames
+
+    # Başlatıcısı kalmamış profil dizinlerini boyutlarıyla listeler.
+    # Gizli dizinler (şablonlar, silinmeyi bekleyenler) ve yeni değiştirilen profiller atlanır.
+    def find_orphan_profiles(self, grace_period=GC_GRACE_PERIOD):
+        codenames = self.get_webapp_codenames()
+        newest = time.time() - grace_period
+        orphans = []
+        for profiles_dir, prefix in PROFILE_BASES:
+            try:
+                with os.scandir(profiles_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                            continue
+                        codename = entry.name[len(prefix):] if entry.name.startswith(prefix) else entry.name
+                        if codename in codenames or entry.stat(follow_symlinks=False).st_mtime > newest:
+                            continue
+                        orphans.append({"path": entry.path, "codename": codename})
+            except OSError:
+                continue
+
+        # Birden çok bağlantısı olan dosyalar (şablon ve dedupe bağlantıları) yalnızca tüm bağlantıları
+        # artık profillerdeyse yer kazandırır; öyleyse onları içeren ilk profile yazılır, değilse
+        # "shared" olarak ayrıca gösterilir.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=GC_WORKERS) as executor:
+            usages = list(executor.map(get_disk_usage, [orphan["path"] for orphan in orphans]))
+        links = {}
+        for usage, linked in usages:
+            for inode, (size, nlink, count) in linked.items():
+                links.setdefault(inode, [size, nlink, 0])[2] += count
+        counted = set()
+        for orphan, (usage, linked) in zip(orphans, usages):
+            orphan["size"] = usage
+            orphan["shared"] = 0
+            for inode, (size, nlink, count) in linked.items():
+                if links[inode][2] < nlink:
+                    orphan["shared"] += size
+                elif inode not in counted:
+                    counted.add(inode)
+                    orphan["size"] += size
+        return orphans
+
+    # Artık profilleri siler; silinenleri ve geri kazanılan alanı döndürür
+    def collect_orphan_profiles(self, grace_period=GC_GRACE_PERIOD, dry_run=False):
+        orphans = self.find_orphan_profiles(grace_period)
+        reclaimed = 0
+        for orphan in orphans:
+            if dry_run:
+                continue
+            shutil.rmtree(orphan["path"], ignore_errors=True)
+            orphan["deleted"] = not os.path.lexists(orphan["path"])
+            if orphan["deleted"]:
+                reclaimed += orphan["size"]
+        return {"orphans": orphans, "bytes_reclaimed": reclaimed,
+                "bytes_orphaned": sum(orphan["size"] for orphan in orphans),
+                "bytes_shared": sum(orphan["shared"] for orphan in orphans)}
+
+    @_async
+    def reclaim_orphan_profiles(self, grace_period=GC_STARTUP_GRACE_PERIOD):
+        try:
+            self.collect_orphan_profiles(grace_period)
+        except Exception as e:
+            print(e)
+
+    # transaction verilirse başlatıcı commit ile yayımlanır, verilmezse hemen (menüler yenilenmeden)
+    def create_webapp(self, name, url, icon, category, browser, isolate_profile=True, navbar=False, transaction=None):
+        if transaction is None:
+            with LauncherTransaction(refresh=False) as transaction:
+                return self.create_webapp(name, url, icon, category, browser, isolate_profile, navbar, transaction)
 
-    def create_webapp(self, name, url, icon, category, browser, isolate_profile=True, navbar=False):
 	    # 4 basamaklı rastgele bir kod oluşturalım (ad çakışmalarını önlemek için, böylece aynı ada sahip birden fazla başlatıcı tanımlayabiliriz)
-        random_code =  ''.join(choice(string.digits) for _ in range(4))
-        codename = "".join(filter(str.isalpha, name)) + random_code
-        path = os.path.join(APPS_DIR, "webapp-%s.desktop" % codename)
+        # Toplu oluşturmada aynı kod denk gelebilir, dosyayı yalnızca yoksa oluşturarak
+        # kullanılmayan bir kod ayıralım (paralel oluşturmada da güvenli).
+        # Yalnızca rakam ya da noktalamayla ayrılan adlar aynı 10000 kodu paylaşır, deneme sayısı sınırlıdır.
+        for attempt in range(CODENAME_ATTEMPTS):
+            random_code =  ''.join(choice(string.digits) for _ in range(4))
+            codename = "".join(filter(str.isalpha, name)) + random_code
+            path = os.path.join(APPS_DIR, "webapp-%s.desktop" % codename)
+            try:
+                desktop_file = transaction.reserve(path)
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(errno.EEXIST, "no free launcher name left for this web app name", name)
 
-        with open(path, 'w') as desktop_file:
+        with desktop_file:
             desktop_file.write("[Desktop Entry]\n")
             desktop_file.write("Version=1.0\n")
             desktop_file.write("Name=%s\n" % name)
@@ -173,9 +623,7 @@ class QuicklyWebManager():
                                     " --profile " + firefox_profile_path +
                                     " --no-remote " + url + "'\n")
 		# Firefox profili oluşturalım
-                shutil.copytree('/usr/share/web-manager/firefox/profile', firefox_profile_path)
-                if navbar:
-                    shutil.copy('/usr/share/web-manager/firefox/userChrome-with-navbar.css', os.path.join(firefox_profile_path, "chrome", "userChrome.css"))
+                provision_firefox_profile(firefox_profile_path, navbar)
             elif browser.browser_type == BROWSER_TYPE_EPIPHANY:
 		# Epiphany tabanlı
                 epiphany_profile_path = os.path.join(EPIPHANY_PROFILES_DIR, "epiphany-" + codename)
@@ -205,33 +653,553 @@ class QuicklyWebManager():
             desktop_file.write("StartupWMClass=WebApp-%s\n" % codename)
             desktop_file.write("StartupNotify=true\n")
             desktop_file.write("X-WebApp-URL=%s\n" % url)
+            desktop_file.write("X-WebApp-Browser=%s\n" % browser.name)
+            desktop_file.write("X-WebApp-Isolated=%s\n" % str(isolate_profile).lower())
+            desktop_file.write("X-WebApp-Navbar=%s\n" % str(navbar).lower())
 
-            if browser.browser_type == BROWSER_TYPE_EPIPHANY:
+        if browser.browser_type == BROWSER_TYPE_EPIPHANY:
 		#Masaüstü dosyasını taşıyın ve bir sembolik link oluşturun
-                new_path = os.path.join(epiphany_profile_path, "epiphany-%s.desktop" % codename)
-                os.makedirs(epiphany_profile_path)
-                os.replace(path, new_path)
-                os.symlink(new_path, path)
+            new_path = os.path.join(epiphany_profile_path, "epiphany-%s.desktop" % codename)
+            staged_path = transaction.get_path(path)
+            os.makedirs(epiphany_profile_path)
+            os.replace(staged_path, new_path)
+            os.symlink(new_path, staged_path)
+
+        return path
+
+    def edit_webapp(self, path, name, url, icon, category, transaction=None):
+        if transaction is None:
+            with LauncherTransaction(refresh=False) as transaction:
+                return self.edit_webapp(path, name, url, icon, category, transaction)
 
-    def edit_webapp(self, path, name, url, icon, category):
         config = configparser.RawConfigParser()
         config.optionxform = str
-        config.read(path)
+        config.read(transaction.get_path(path))
         config.set("Desktop Entry", "Name", name)
         config.set("Desktop Entry", "Icon", icon)
         config.set("Desktop Entry", "Comment", _("Web App"))
         config.set("Desktop Entry", "Categories", "GTK;%s;" % category)
 
-        with open(path, 'w') as configfile:
-            config.write(configfile, space_around_delimiters=False)
+        current_path = transaction.get_path(path)
+        if os.path.islink(current_path):
+            # Epiphany: asıl dosya profil dizininde, bağlantı değişmeden yerinde güncellenir
+            target = os.path.realpath(current_path)
+            tmp_path = "%s.%d.tmp" % (target, os.getpid())
+            with open(tmp_path, 'w') as configfile:
+                config.write(configfile, space_around_delimiters=False)
+            os.replace(tmp_path, target)
+            transaction.touch()
+        else:
+            with open(transaction.stage(path), 'w') as configfile:
+                config.write(configfile, space_around_delimiters=False)
+
+    # Manifesti mevcut web uygulamalarıyla karşılaştırır ve yapılacakları döndürür.
+    # Uygulamalar ada göre eşleştirilir. Adres, tarayıcı, profil ayrımı ya da gezinti çubuğu
+    # değiştiyse uygulama yeniden oluşturulur; yalnızca simge ya da kategori değiştiyse düzenlenir.
+    # prune verilirse manifestte olmayan web uygulamaları silinir.
+    def plan_manifest(self, entries, prune=False):
+        browsers = [browser for browser in self.get_supported_browsers() if os.path.exists(browser.test_path)]
+        existing = {webapp.name: webapp for webapp in self.get_webapps()}
+        plan = {"create": [], "recreate": [], "update": [], "delete": [], "unchanged": []}
+        names = set()
+        for entry in entries:
+            entry = dict(MANIFEST_DEFAULTS, **entry)
+            if not entry.get("name") or not entry.get("url"):
+                raise ValueError("manifest entries need a name and a url: %s" % entry)
+            if entry["name"] in names:
+                raise ValueError("duplicate web app in manifest: %s" % entry["name"])
+            names.add(entry["name"])
+            entry["browser"] = get_browser_by_name(browsers, entry["browser"])
+
+            # Gezinti çubuğu yalnızca Firefox'ta, profil ayrımı yalnızca Chromium tabanlılarda işe yarar;
+            # başka tarayıcılarda bu ayarlar için profili silip yeniden oluşturmayalım
+            browser_type = entry["browser"].browser_type
+            uses_navbar = browser_type in [BROWSER_TYPE_FIREFOX, BROWSER_TYPE_FIREFOX_FLATPAK]
+            uses_isolation = browser_type not in [BROWSER_TYPE_FIREFOX, BROWSER_TYPE_FIREFOX_FLATPAK, BROWSER_TYPE_EPIPHANY]
+
+            webapp = existing.get(entry["name"])
+            if webapp is None:
+                plan["create"].append((None, entry))
+            elif webapp.url != entry["url"] or \
+                    (webapp.browser is not None and webapp.browser != entry["browser"].name) or \
+                    (uses_isolation and webapp.isolated is not None and webapp.isolated != entry["isolation"]) or \
+                    (uses_navbar and webapp.navbar is not None and webapp.navbar != entry["navbar"]):
+                plan["recreate"].append((webapp, entry))
+            elif webapp.icon != entry["icon"] or webapp.category != entry["category"]:
+                plan["update"].append((webapp, entry))
+            else:
+                plan["unchanged"].append((webapp, entry))
+
+        if prune:
+            for name, webapp in existing.items():
+                if name not in names:
+                    plan["delete"].append((webapp, None))
+        return plan
+
+    # Manifesti uygular. Düzenleme ve silme hızlıdır, sırayla yapılır; profil kopyalamayı
+    # da içeren oluşturma işleri iş parçacığı havuzunda paralel çalışır.
+    # Tüm başlatıcılar tek bir işlemle yayımlanır, menüler bir kez yenilenir.
+    def apply_manifest(self, entries, prune=False, workers=MANIFEST_WORKERS):
+        plan = self.plan_manifest(entries, prune)
+        result = {action: [] for action in plan}
+        result["errors"] = []
+        with LauncherTransaction() as transaction:
+            self.apply_manifest_plan(plan, result, transaction, workers)
+        return result
+
+    def apply_manifest_plan(self, plan, result, transaction, workers):
+        def create(webapp, entry):
+            if webapp is not None:
+                self.delete_webbapp(webapp, transaction=transaction)
+            self.create_webapp(entry["name"], entry["url"], entry["icon"], entry["category"],
+                               entry["browser"], entry["isolation"], entry["navbar"], transaction)
+
+        for webapp, entry in plan["delete"]:
+            self.delete_webbapp(webapp, transaction=transaction)
+            result["delete"].append(webapp.name)
+        for webapp, entry in plan["update"]:
+            self.edit_webapp(webapp.path, entry["name"], entry["url"], entry["icon"], entry["category"], transaction)
+            result["update"].append(entry["name"])
+        for webapp, entry in plan["unchanged"]:
+            result["unchanged"].append(entry["name"])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for action in ["create", "recreate"]:
+                for webapp, entry in plan[action]:
+                    futures[executor.submit(create, webapp, entry)] = (action, entry["name"])
+            for future in concurrent.futures.as_completed(futures):
+                action, name = futures[future]
+                try:
+                    future.result()
+                    result[action].append(name)
+                except Exception as e:
+                    traceback.print_exc()
+                    result["errors"].append({"name": name, "error": str(e)})
+
+# Manifest alanlarının varsayılanları ("browser" None ise ilk kurulu tarayıcı)
+MANIFEST_DEFAULTS = {"icon": "web-manager", "category": "Network", "browser": None, "isolation": True, "navbar": False}
+
+# Tarayıcıyı adına göre bulur (büyük/küçük harf duyarsız), ad verilmezse ilk tarayıcı
+def get_browser_by_name(browsers, name=None):
+    for browser in browsers:
+        if name is None or browser.name.lower() == name.lower():
+            return browser
+    if name is None:
+        raise ValueError("no supported browser found")
+    raise ValueError("browser not found: %s" % name)
+
+# Manifest JSON ya da YAML olabilir (.yaml/.yml için PyYAML gerekir).
+# Bir web uygulaması listesi ya da {"webapps": [...]} biçiminde olmalıdır.
+def load_manifest(path):
+    with open(path) as manifest_file:
+        if path.endswith(".yaml") or path.endswith(".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("PyYAML is required to read YAML manifests")
+            manifest = yaml.safe_load(manifest_file)
+        else:
+            manifest = json.load(manifest_file)
+    if isinstance(manifest, dict):
+        manifest = manifest.get("webapps", [])
+    if not isinstance(manifest, list):
+        raise ValueError("manifest must be a list of web apps")
+    return manifest
+
+# Firefox profilleri sistemdeki şablondan kopyalanmaz, profillerle aynı dizindeki salt okunur
+# bir kullanıcı şablonundan dosya dosya klonlanır: önce reflink (yazınca kopyala), dosya sistemi
+# desteklemiyorsa sabit bağlantı, o da olmazsa normal kopya. Böylece her profil neredeyse hiç yer kaplamaz.
+FIREFOX_TEMPLATE_DIR = "/usr/share/web-manager/firefox"
+FIREFOX_PROFILE_TEMPLATE = os.path.join(FIREFOX_TEMPLATE_DIR, "profile")
+FIREFOX_NAVBAR_CSS = os.path.join(FIREFOX_TEMPLATE_DIR, "userChrome-with-navbar.css")
+# Kullanıcı şablonları profil dizininde gizli dizinlerdir, içlerinde sistem şablonunun imzası saklanır
+TEMPLATE_PREFIX = ".template"
+TEMPLATE_STAMP = ".stamp"
+# linux/fs.h: FICLONE = _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# Bu hatalar yöntemin o dosya sisteminde hiç çalışmayacağını gösterir
+CLONE_UNSUPPORTED_ERRORS = (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.ENOSYS)
+
+# (kaynak aygıt, hedef aygıt) -> desteklenmeyen yöntemler
+_unsupported_clone_methods = {}
+# reflink'in çalıştığı görülen (kaynak aygıt, hedef aygıt) çiftleri
+_reflink_supported = set()
+_firefox_templates = {}
+_firefox_templates_lock = threading.Lock()
+
+# Dosyayı FICLONE ile klonlar; veri blokları dosyalar arasında ayrılana kadar paylaşılır
+def reflink_file(source, destination):
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            os.unlink(destination)
+            raise
+    shutil.copystat(source, destination)
+
+# Dosyayı reflink, sabit bağlantı (allow_hardlink ise) ya da kopya (allow_copy ise) ile oluşturur, kullanılan yöntemi döndürür.
+# Sabit bağlantı aynı inode'u paylaştığından yalnızca yerinde değiştirilmeyecek dosyalar için kullanılmalıdır.
+def clone_file(source, destination, allow_hardlink=False, allow_copy=True):
+    key = (os.stat(source).st_dev, os.stat(os.path.dirname(destination)).st_dev)
+    unsupported = _unsupported_clone_methods.get(key, set())
+    for method in ["reflink", "hardlink"]:
+        if method in unsupported or (method == "hardlink" and not allow_hardlink):
+            continue
+        try:
+            if method == "reflink":
+                reflink_file(source, destination)
+                # Klon bağımsız bir dosyadır, şablonun salt okunurluğunu taşımasın
+                os.chmod(destination, os.stat(source).st_mode | 0o200)
+            else:
+                os.link(source, destination)
+            return method
+        except OSError as e:
+            if e.errno not in CLONE_UNSUPPORTED_ERRORS:
+                raise
+            _unsupported_clone_methods[key] = unsupported | {method}
+            unsupported = _unsupported_clone_methods[key]
+    if not allow_copy:
+        raise OSError(errno.EOPNOTSUPP, "cannot share data between files", destination)
+    shutil.copy2(source, destination)
+    os.chmod(destination, os.stat(source).st_mode | 0o200)
+    return "copy"
+
+# Sistem şablonunun imzası: dosya yolları, boyutları ve değişiklik zamanları
+def get_firefox_template_stamp(navbar):
+    stamp = []
+    for root, dirs, files in os.walk(FIREFOX_PROFILE_TEMPLATE):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            stamp.append("%s:%d:%d" % (os.path.relpath(path, FIREFOX_PROFILE_TEMPLATE), stat.st_size, stat.st_mtime_ns))
+    if navbar:
+        stat = os.stat(FIREFOX_NAVBAR_CSS)
+        stamp.append("navbar:%d:%d" % (stat.st_size, stat.st_mtime_ns))
+    return "\n".join(stamp)
+
+# Profil dizinindeki kullanıcı şablonunu döndürür; yoksa ya da sistem şablonu değiştiyse yeniden oluşturur.
+# Şablon dosyaları salt okunurdur, çünkü sabit bağlantı ile tüm profiller aynı dosyaları paylaşabilir.
+def get_firefox_template(profiles_dir, navbar=False):
+    template = os.path.join(profiles_dir, TEMPLATE_PREFIX + ("-navbar" if navbar else ""))
+    with _firefox_templates_lock:
+        if _firefox_templates.get(template):
+            return template
+        stamp = get_firefox_template_stamp(navbar)
+        try:
+            with open(os.path.join(template, TEMPLATE_STAMP)) as stamp_file:
+                current = stamp_file.read() == stamp
+        except OSError:
+            current = False
+
+        if not current:
+            os.makedirs(profiles_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=profiles_dir, prefix=TEMPLATE_PREFIX + "-tmp-")
+            shutil.copytree(FIREFOX_PROFILE_TEMPLATE, staging, dirs_exist_ok=True)
+            if navbar:
+                shutil.copy(FIREFOX_NAVBAR_CSS, os.path.join(staging, "chrome", "userChrome.css"))
+            for root, dirs, files in os.walk(staging):
+                for name in files:
+                    os.chmod(os.path.join(root, name), 0o444)
+            os.chmod(staging, 0o755)
+            with open(os.path.join(staging, TEMPLATE_STAMP), 'w') as stamp_file:
+                stamp_file.write(stamp)
+            # Eski şablonu kenara alıp yenisini tek adımda yerine koyalım; mevcut profiller
+            # eski dosyalara bağlı kalır, bu yüzden eski şablonu silmek onları etkilemez
+            if os.path.exists(template):
+                old_template = tempfile.mkdtemp(dir=profiles_dir, prefix=TEMPLATE_PREFIX + "-old-")
+                os.replace(template, os.path.join(old_template, "template"))
+                shutil.rmtree(old_template, ignore_errors=True)
+            try:
+                os.rename(staging, template)
+            except OSError:
+                # Başka bir süreç aynı anda oluşturdu, onunkini kullanalım
+                shutil.rmtree(staging, ignore_errors=True)
+
+        _firefox_templates[template] = True
+        return template
+
+# Firefox profilini kullanıcı şablonundan dosya dosya klonlayarak oluşturur
+def provision_firefox_profile(profile_path, navbar=False):
+    template = get_firefox_template(os.path.dirname(profile_path), navbar)
+    for root, dirs, files in os.walk(template):
+        target = os.path.normpath(os.path.join(profile_path, os.path.relpath(root, template)))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            if root == template and name == TEMPLATE_STAMP:
+                continue
+            clone_file(os.path.join(root, name), os.path.join(target, name), allow_hardlink=True)
+
+# Profil dizinlerindeki aynı içerikli dosyaların veri bloklarını paylaştırır.
+# Dosyalar önce boyuta, sonra ilk bloğun, en son da tüm içeriğin özetine göre gruplanır.
+# Reflink her dosya için güvenlidir; sabit bağlantı ise yalnızca tarayıcıların yerinde
+# değiştirmediği eklenti ve sözlük gibi dosyalarda kullanılır.
+DEDUPE_WORKERS = 8
+# Bundan küçük dosyaları paylaştırmak yer kazandırmaz
+DEDUPE_MIN_SIZE = 4096
+# Son değiştirilen dosyalar (tarayıcı çalışıyor olabilir) atlanır (saniye)
+DEDUPE_MIN_AGE = 60 * 60
+DEDUPE_PARTIAL_SIZE = 64 * 1024
+DEDUPE_HARDLINK_SUFFIXES = (".xpi", ".crx", ".bdic", ".dic", ".aff", ".woff", ".woff2", ".ttf")
+
+# Tarayıcı çalışırken profilinde bu sembolik linkler bulunur, hedefleri "adres:+pid" (Firefox)
+# ya da "makine-pid" (Chromium) biçimindedir. Çöken tarayıcı bunları bırakabilir, bu yüzden süreç denetlenir.
+PROFILE_LOCK_LINKS = ["lock", "SingletonLock"]
+# Firefox çalışırken bu dosyayı fcntl ile kilitler
+PROFILE_LOCK_FILE = ".parentlock"
+
+# Profili kullanan bir tarayıcı çalışıyor mu? Emin olunamayan durumlar kullanımda sayılır.
+def is_profile_in_use(profile_path):
+    for name in PROFILE_LOCK_LINKS:
+        try:
+            target = os.readlink(os.path.join(profile_path, name))
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return True
+        match = re.search(r"(\d+)$", target)
+        if match is None:
+            return True
+        try:
+            os.kill(int(match.group(1)), 0)
+            return True
+        except ProcessLookupError:
+            continue
+        except OSError:
+            return True
+
+    try:
+        lock_fd = os.open(os.path.join(profile_path, PROFILE_LOCK_FILE), os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+    try:
+        fcntl.lockf(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.lockf(lock_fd, fcntl.LOCK_UN)
+        return False
+    except OSError:
+        return True
+    finally:
+        os.close(lock_fd)
+
+# Profil dizini altındaki dosyaları os.scandir ile dolaşır, (yol, stat) döndürür.
+# Üst düzeydeki gizli dizinler (şablonlar, silinmeyi bekleyenler) ve tarayıcısı çalışan profiller atlanır;
+# açık bir veritabanının yerine yeni bir dosya konursa tarayıcının yazdıkları kaybolur.
+def scan_profile_files(profiles_dir):
+    files = []
+    stack = [(profiles_dir, True)]
+    while stack:
+        directory, top = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if top and (entry.name.startswith(".") or is_profile_in_use(entry.path)):
+                            continue
+                        stack.append((entry.path, False))
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append((entry.path, entry.stat(follow_symlinks=False)))
+        except OSError:
+            continue
+    return files
+
+# Dizinin diskte kapladığı alan (bayt). Tek bağlantılı dosyalar ve dizinler usage'a eklenir;
+# birden çok bağlantısı olan dosyalar {(aygıt, inode): [boyut, bağlantı sayısı, dizindeki bağlantı sayısı]}
+# olarak ayrıca döndürülür, çünkü diğer bağlantıları dizin dışında olabilir.
+def get_disk_usage(path):
+    try:
+        usage = os.stat(path, follow_symlinks=False).st_blocks * 512
+    except OSError:
+        usage = 0
+    linked = {}
+    stack = [path]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif stat.st_nlink > 1:
+                        linked.setdefault((stat.st_dev, stat.st_ino), [stat.st_blocks * 512, stat.st_nlink, 0])[2] += 1
+                        continue
+                    usage += stat.st_blocks * 512
+        except OSError:
+            continue
+    return usage, linked
+
+def hash_file(path, limit=None):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as data_file:
+        while True:
+            chunk = data_file.read(min(1024 * 1024, limit) if limit else 1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if limit:
+                limit -= len(chunk)
+                if limit <= 0:
+                    break
+    return digest.digest()
+
+# Grupları dosya özetine göre böler, tek elemanlı kalan grupları atar
+def split_by_hash(executor, groups, limit=None):
+    result = []
+    for group in groups:
+        futures = {executor.submit(hash_file, path, limit): (path, stat) for path, stat in group}
+        buckets = {}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                buckets.setdefault(future.result(), []).append(futures[future])
+            except OSError:
+                continue
+        result.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    return result
+
+# Tarayıcıların yerinde değiştirmediği, sabit bağlantıyla paylaşılabilecek dosya
+def can_hardlink(path):
+    return path.lower().endswith(DEDUPE_HARDLINK_SUFFIXES)
+
+# Hedef dosyayı kaynağın klonuyla tek adımda değiştirir; geçici dosya aynı dizinde oluşturulur.
+# Sabit bağlantı yalnızca kaynak da hedef de paylaşılabilecek dosyalarsa kullanılır.
+def replace_with_clone(source, target, target_stat):
+    allow_hardlink = can_hardlink(source) and can_hardlink(target)
+    temporary = os.path.join(os.path.dirname(target), ".%s.dedupe-%s" % (os.path.basename(target), os.urandom(4).hex()))
+    method = clone_file(source, temporary, allow_hardlink=allow_hardlink, allow_copy=False)
+    try:
+        if method == "reflink":
+            shutil.copystat(target, temporary)
+        # Tarama ile değiştirme arasında dosya değiştiyse dokunmayalım
+        stat = os.stat(target, follow_symlinks=False)
+        if (stat.st_size, stat.st_mtime_ns, stat.st_ino) != (target_stat.st_size, target_stat.st_mtime_ns, target_stat.st_ino):
+            raise OSError(errno.EBUSY, "file changed while deduplicating", target)
+        os.replace(temporary, target)
+    except OSError:
+        os.unlink(temporary)
+        raise
+    return method
+
+# Kaynağın dizindeki bir dosyaya reflink ile klonlanıp klonlanamayacağını geçici bir klonla dener.
+# Sonuç clone_file ile aynı şekilde aygıt çifti başına saklanır.
+def can_reflink(source, directory):
+    key = (os.stat(source).st_dev, os.stat(directory).st_dev)
+    if "reflink" in _unsupported_clone_methods.get(key, set()):
+        return False
+    if key in _reflink_supported:
+        return True
+    probe = os.path.join(directory, ".dedupe-probe-%s" % os.urandom(4).hex())
+    try:
+        clone_file(source, probe, allow_copy=False)
+        _reflink_supported.add(key)
+        return True
+    except OSError:
+        return False
+    finally:
+        if os.path.lexists(probe):
+            os.unlink(probe)
+
+# dry_run'da bir kopyanın hangi yöntemle paylaştırılacağı, paylaştırılamıyorsa None
+def get_dedupe_method(source, target):
+    if can_reflink(source, os.path.dirname(target)):
+        return "reflink"
+    key = (os.stat(source).st_dev, os.stat(os.path.dirname(target)).st_dev)
+    if can_hardlink(source) and can_hardlink(target) and "hardlink" not in _unsupported_clone_methods.get(key, set()):
+        return "hardlink"
+    return None
+
+# Tüm profil dizinlerini tarar ve yinelenen dosyaları paylaştırır; dry_run ise yalnızca raporlar.
+# bytes_duplicated tüm kopyaların, bytes_saved paylaştırılan (dry_run'da paylaştırılabilecek) kopyaların boyutudur.
+def dedupe_profiles(dry_run=False, profiles_dirs=None, workers=DEDUPE_WORKERS):
+    if profiles_dirs is None:
+        profiles_dirs = [profiles_dir for profiles_dir, prefix in PROFILE_BASES]
+    summary = {"files": 0, "duplicates": 0, "bytes_duplicated": 0, "bytes_saved": 0, "reflink": 0, "hardlink": 0, "skipped": 0}
+    newest = time.time() - DEDUPE_MIN_AGE
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # Aynı aygıtta ve aynı boyutta olanlar, zaten aynı inode'u paylaşanlar bir kez sayılır
+        buckets = {}
+        for files in executor.map(scan_profile_files, [directory for directory in profiles_dirs if os.path.isdir(directory)]):
+            summary["files"] += len(files)
+            for path, stat in files:
+                if stat.st_size < DEDUPE_MIN_SIZE or stat.st_mtime > newest:
+                    continue
+                inodes = buckets.setdefault((stat.st_dev, stat.st_size), {})
+                inodes.setdefault(stat.st_ino, (path, stat))
+        groups = [list(inodes.values()) for inodes in buckets.values() if len(inodes) > 1]
+
+        groups = split_by_hash(executor, groups, DEDUPE_PARTIAL_SIZE)
+        groups = split_by_hash(executor, [group for group in groups if group[0][1].st_size > DEDUPE_PARTIAL_SIZE]) + \
+                 [group for group in groups if group[0][1].st_size <= DEDUPE_PARTIAL_SIZE]
+
+    for group in groups:
+        # Kaynak her seferinde aynı seçilsin (gerçek çalıştırma ile dry_run aynı sonucu versin):
+        # önce sabit bağlantıyla paylaşılabilecek, sonra en çok bağlantısı olan, sonra yola göre ilk dosya
+        group.sort(key=lambda item: (not can_hardlink(item[0]), -item[1].st_nlink, item[0]))
+        source = group[0][0]
+        for path, stat in group[1:]:
+            summary["duplicates"] += 1
+            summary["bytes_duplicated"] += stat.st_size
+            try:
+                if dry_run:
+                    method = get_dedupe_method(source, path)
+                else:
+                    method = replace_with_clone(source, path, stat)
+            except OSError:
+                method = None
+            if method is None:
+                summary["skipped"] += 1
+                continue
+            summary[method] += 1
+            summary["bytes_saved"] += stat.st_size
+    return summary
+
+import base64
+import codecs
+import html.parser
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
-from PIL import Image
 from io import BytesIO
-import requests
-import json
+# requests ve PIL yalnızca favicon aranırken, ilk kullanımda yüklenir.
+# Böylece pencere açılırken ağ ve görüntü kütüphaneleri yüklenmez.
+
+# Her bir isteğin zaman aşımı ve tüm favicon aramasının süre sınırı (saniye)
+FAVICON_TIMEOUT = 3
+FAVICON_DEADLINE = 6
+FAVICON_WORKERS = 8
+# HTML sayfasında simge bağlantıları için okunacak en fazla bayt
+HTML_SCAN_LIMIT = 256 * 1024
+# Simge adayları: başlık için okunan ilk parça, kabul edilen en küçük/en büyük boyut ve en fazla bayt
+IMAGE_PROBE_SIZE = 16 * 1024
+IMAGE_MIN_SIZE = 16
+IMAGE_MAX_SIZE = 256
+IMAGE_MAX_BYTES = 4 * 1024 * 1024
+# Alan adı başına favicon önbelleği: geçerlilik süresi, arka planda yenileme yaşı ve kayıt sınırı
+FAVICON_CACHE_TTL = 30 * 24 * 60 * 60
+FAVICON_CACHE_REVALIDATE = 24 * 60 * 60
+FAVICON_CACHE_SIZE = 256
+
+_session = None
+_session_lock = threading.Lock()
+
+# Tüm favicon istekleri bağlantıları yeniden kullanan ortak bir oturumdan geçer
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            import requests.adapters
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=FAVICON_WORKERS, pool_maxsize=FAVICON_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
 
 def normalize_url(url):
     (scheme, netloc, path, _, _, _) = urllib.parse.urlparse(url, "http")
@@ -239,87 +1207,308 @@ def normalize_url(url):
         return urllib.parse.urlunparse((scheme, path, "", "", "", ""))
     return urllib.parse.urlunparse((scheme, netloc, path, "", "", ""))
 
-def download_image(root_url, link):
-    image = None
+def get_absolute_link(root_url, link):
     if ("://") not in link:
-        if link.startswith("/"):
+        if link.startswith("//"):
+            link = root_url.split("//")[0] + link
+        elif link.startswith("/"):
             link = root_url + link
         else:
             link = root_url + "/" + link
+    return link
+
+# ICO dosyaları birden fazla çözünürlük içerir, en büyüğünü seçelim.
+# (ICNS için Pillow zaten en büyük boyutu seçer.)
+def select_largest_frame(image):
+    if image.format == "ICO" and image.info.get("sizes"):
+        image.size = max(image.info["sizes"], key=lambda size: size[0] * size[1])
+    return image
+
+# Verinin yalnızca başından biçimi ve boyutu okur, anlaşılamazsa None döner
+def probe_image_size(data):
+    from PIL import Image
+    try:
+        return select_largest_frame(Image.open(BytesIO(data))).size
+    except Exception:
+        return None
+
+def download_image(root_url, link):
+    from PIL import Image
+    image = None
+    link = get_absolute_link(root_url, link)
     try:
-        response = requests.get(link, timeout=3)
-        image = Image.open(BytesIO(response.content))
-        if image.height > 256:
-            image = image.resize((256, 256), Image.BICUBIC)
+        with get_session().get(link, timeout=FAVICON_TIMEOUT, stream=True) as response:
+            content_type = response.headers.get("Content-Type", "")
+            content_length = int(response.headers.get("Content-Length") or 0)
+            # Hata sayfaları ve çok büyük dosyalar indirilmez
+            if response.status_code != 200 or content_type.startswith("text/") or content_length > IMAGE_MAX_BYTES:
+                return None
+            chunks = response.iter_content(IMAGE_PROBE_SIZE)
+            data = bytearray(next(chunks, b""))
+            # Başlıktan boyut okunabildiyse işe yaramayacak kadar küçük adayları indirmeyelim
+            size = probe_image_size(bytes(data))
+            if size is not None and min(size) < IMAGE_MIN_SIZE:
+                return None
+            for chunk in chunks:
+                data += chunk
+                if len(data) > IMAGE_MAX_BYTES:
+                    return None
+        image = select_largest_frame(Image.open(BytesIO(data)))
+        # thumbnail() JPEG için draft, diğerleri için reduce kullanarak ucuza küçültür
+        image.thumbnail((IMAGE_MAX_SIZE, IMAGE_MAX_SIZE), reducing_gap=2.0)
     except Exception as e:
         print(e)
         print(link)
         image = None
     return image
 
-import tempfile
+#İndirilen bir favicon adayı. Görüntü PNG olarak bellekte tutulur,
+#yalnızca kullanıcının seçtiği simge diske yazılır.
+class Favicon():
 
-def download_favicon(url):
-    images = []
-    url = normalize_url(url)
-    (scheme, netloc, path, _, _, _) = urllib.parse.urlparse(url)
-    root_url = "%s://%s" % (scheme, netloc)
+    def __init__(self, source, data, width, height):
+        self.source = source
+        self.data = data
+        self.width = width
+        self.height = height
 
-    # önce favicon grabber deneyin		
+# favicongrabber'ın bulduğu simge bağlantıları
+def get_favicongrabber_links(netloc):
+    links = []
     try:
-        response = requests.get("https://favicongrabber.com/api/grab/%s?pretty=true" % netloc, timeout=3)
+        response = get_session().get("https://favicongrabber.com/api/grab/%s?pretty=true" % netloc, timeout=FAVICON_TIMEOUT)
         if response.status_code == 200:
             source = response.content.decode("UTF-8")
             array = json.loads(source)
             for icon in array['icons']:
-                image = download_image(root_url, icon['src'])
-                if image != None:
-                    t = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                    images.append(["Favicon Grabber", image, t.name])
-                    image.save(t.name)
-        images = sorted(images, key = lambda x: (x[1].height), reverse=True)
-        return images
+                links.append(["Favicon Grabber", icon['src']])
     except Exception as e:
         print(e)
+    return links
 
-    #Fallback : HTML ile /favicon.ico' yu kontrol edin
-    try:
-        response = requests.get(url, timeout=3)
-        if response != None:
-            import bs4
-            soup = bs4.BeautifulSoup(response.content, "html.parser")
-	
-            # HTML de tanımlanan simgeler
-            for iconformat in ["apple-touch-icon", "shortcut icon", "icon", "msapplication-TileImage"]:
-                item = soup.find("link", {"rel": iconformat})
-                if item != None:
-                    image = download_image(root_url, item["href"])
-                    if image != None:
-                        t = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                        images.append([iconformat, image, t.name])
-                        image.save(t.name)
-
-            # favicon.ico
-            image = download_image(root_url, "/favicon.ico")
-            if image != None:
-                t = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                images.append(["favicon", image, t.name])
-                image.save(t.name)  
-            
-	        # OG:IMAGE
-            item = soup.find("meta", {"property": "og:image"})
-            if item != None:
-                image = download_image(root_url, item['content'])
-                if image != None:
-                    t = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                    images.append(["og:image", image, t.name])
-                    image.save(t.name)
+#<head> içindeki simge bağlantılarını tek geçişte toplayan artımlı ayrıştırıcı.
+#</head> ya da <body> görülünce done işaretlenir, sayfanın geri kalanı okunmaz.
+class IconLinkParser(html.parser.HTMLParser):
+
+    LINK_RELS = ["apple-touch-icon", "apple-touch-icon-precomposed", "shortcut icon", "icon", "msapplication-TileImage"]
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.done = False
 
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+            return
+        attrs = dict(attrs)
+        if tag == "link" and attrs.get("href"):
+            rel = " ".join((attrs.get("rel") or "").split())
+            for iconformat in self.LINK_RELS:
+                if rel.lower() == iconformat.lower():
+                    self.links.append([iconformat, attrs["href"]])
+                    break
+            else:
+                if "icon" in rel.lower().split():
+                    self.links.append(["icon", attrs["href"]])
+        elif tag == "meta" and attrs.get("content"):
+            if attrs.get("property") == "og:image":
+                self.links.append(["og:image", attrs["content"]])
+            elif attrs.get("name") == "msapplication-TileImage":
+                self.links.append(["msapplication-TileImage", attrs["content"]])
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+# HTML de tanımlanan simge bağlantıları.
+# Sayfa parça parça okunur ve <head> bittiğinde ya da sınır aşıldığında bağlantı kapatılır.
+def get_html_links(url):
+    parser = IconLinkParser()
+    try:
+        with get_session().get(url, timeout=FAVICON_TIMEOUT, stream=True) as response:
+            try:
+                decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            size = 0
+            for chunk in response.iter_content(8192):
+                size += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if parser.done or size >= HTML_SCAN_LIMIT:
+                    break
     except Exception as e:
         print(e)
+    return parser.links
+
+#Alan adı (netloc) başına bulunan simgeleri ~/.cache altında saklar.
+#Her kayıt PNG'ye çevrilmiş simgeleri ve kaynak etiketlerini içerir;
+#süresi dolanlar yok sayılır, sınır aşılınca en uzun süredir kullanılmayanlar silinir.
+class FaviconCache():
+
+    def __init__(self, directory=FAVICONS_DIR, ttl=FAVICON_CACHE_TTL, max_entries=FAVICON_CACHE_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get_path(self, netloc):
+        return os.path.join(self.directory, hashlib.sha1(netloc.encode("UTF-8")).hexdigest() + ".json")
+
+    # (yaş, [(kaynak, png verisi), ...]) döndürür, kayıt yoksa, süresi dolduysa ya da okunamıyorsa None
+    def load(self, netloc):
+        path = self.get_path(netloc)
+        try:
+            with open(path) as cache_file:
+                data = json.load(cache_file)
+            age = time.time() - data["time"]
+            if data.get("netloc") != netloc or age > self.ttl:
+                return None
+            icons = [(icon["source"], base64.b64decode(icon["data"])) for icon in data["icons"]]
+            # Son kullanım zamanı, silinecek kayıtları seçmek için kullanılır.
+            # Kayıt bu arada silinmiş olabilir (evict, yeniden doğrulama), bu bir hata değildir.
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            return (age, icons)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Bozuk kayıt, önbellekte yokmuş gibi davranalım
+            print(e)
+            return None
+
+    def save(self, netloc, icons):
+        path = self.get_path(netloc)
+        tmp_path = "%s.%d.tmp" % (path, threading.get_ident())
+        data = {"netloc": netloc, "time": time.time(),
+                "icons": [{"source": source, "data": base64.b64encode(icon).decode("ascii")} for source, icon in icons]}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as cache_file:
+                json.dump(data, cache_file)
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            print(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+            entries.sort()
+            for mtime, path in entries[:max(0, len(entries) - self.max_entries)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+favicon_cache = FaviconCache()
+_revalidating = set()
+
+# favicongrabber, HTML sayfası ve /favicon.ico aynı anda denenir, bulunan simgeler de
+# paralel indirilir. Süre sınırı dolduğunda o ana kadar bitenler döndürülür.
+# Sonuç [(kaynak, PNG verisi, PIL görüntüsü), ...] biçimindedir; callback verilirse
+# her simge çözülür çözülmez aynı biçimde ona da iletilir.
+def discover_favicons(url, deadline=FAVICON_DEADLINE, callback=None):
+    icons = []
+    (scheme, netloc, path, _, _, _) = urllib.parse.urlparse(url)
+    root_url = "%s://%s" % (scheme, netloc)
+    end_time = time.monotonic() + deadline
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=FAVICON_WORKERS)
+    sources = {}
+    links = set()
+    pending = set()
+
+    def fetch_image(source, link):
+        link = get_absolute_link(root_url, link)
+        if link not in links:
+            links.add(link)
+            future = executor.submit(download_image, root_url, link)
+            sources[future] = source
+            pending.add(future)
+
+    pending.add(executor.submit(get_favicongrabber_links, netloc))
+    pending.add(executor.submit(get_html_links, url))
+    fetch_image("favicon", "/favicon.ico")
+
+    while pending:
+        remaining = end_time - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = concurrent.futures.wait(pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future not in sources:
+                for source, link in future.result():
+                    fetch_image(source, link)
+                continue
+            image = future.result()
+            if image != None:
+                try:
+                    buffer = BytesIO()
+                    image.save(buffer, "PNG")
+                except Exception as e:
+                    print(e)
+                    continue
+                icon = (sources[future], buffer.getvalue(), image)
+                icons.append(icon)
+                if callback is not None:
+                    callback(*icon)
+
+    # Süre dolduysa bekleyen indirmeleri bırakalım
+    executor.shutdown(wait=False, cancel_futures=True)
+    return icons
+
+# Önbellekteki kaydı arka planda yeniler
+@_async
+def revalidate_favicons(url, netloc):
+    try:
+        icons = discover_favicons(url)
+        if len(icons) > 0:
+            favicon_cache.save(netloc, [(source, data) for source, data, image in icons])
+    finally:
+        _revalidating.discard(netloc)
+
+# Favicon nesnelerinin listesini döndürür. callback verilirse her aday bulunur bulunmaz
+# ona da iletilir, böylece arayüz ilk simgeyi son simgeyi beklemeden gösterebilir.
+def download_favicon(url, deadline=FAVICON_DEADLINE, callback=None):
+    images = []
+    url = normalize_url(url)
+    (scheme, netloc, path, _, _, _) = urllib.parse.urlparse(url)
+
+    from PIL import Image
+
+    def add_image(source, data, image):
+        images.append(Favicon(source, data, image.width, image.height))
+        if callback is not None:
+            callback(images[-1])
+
+    # Önbellekte varsa hemen kullanılır, eskiyse arka planda yenilenir
+    cached = favicon_cache.load(netloc)
+    if cached is not None:
+        age, icons = cached
+        if age > FAVICON_CACHE_REVALIDATE and netloc not in _revalidating:
+            _revalidating.add(netloc)
+            revalidate_favicons(url, netloc)
+        for source, data in icons:
+            add_image(source, data, Image.open(BytesIO(data)))
+    else:
+        icons = discover_favicons(url, deadline, add_image)
+        if len(icons) > 0:
+            favicon_cache.save(netloc, [(source, data) for source, data, image in icons])
 
-    images = sorted(images, key = lambda x: (x[1].height), reverse=True)
+    images = sorted(images, key = lambda x: (x.height), reverse=True)
     return images
 
 if __name__ == "__main__":
-    download_favicon(sys.argv[1])    
+    download_favicon(sys.argv[1])
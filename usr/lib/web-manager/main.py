@@ -1,23 +1,25 @@
 #!/usr/bin/python3
+import functools
 import gettext
 import gi
+import hashlib
 import locale
 import os
 import re
-import setproctitle
-import shutil
 import subprocess
-import tldextract
+import threading
+import time
+import traceback
+import urllib.parse
 import warnings
 import ThemedIconChooser
+from collections import OrderedDict
 
 gi.require_version("Gtk", "3.0")
 
 from gi.repository import Gtk, Gdk, Gio, GdkPixbuf, GLib
 
-from common import _async, idle, QuicklyWebManager, Browser, download_favicon, ICONS_DIR, BROWSER_TYPE_FIREFOX
-
-setproctitle.setproctitle("quickly-web-manager")
+from common import _async, idle, QuicklyWebManager, Browser, download_favicon, APPS_DIR, ICONS_DIR, THUMBNAILS_DIR, BROWSER_TYPE_FIREFOX
 
 warnings.filterwarnings("ignore")
 
@@ -29,9 +31,237 @@ gettext.textdomain(APP)
 _ = gettext.gettext
 
 COL_ICON, COL_NAME, COL_WEBAPP = range(3)
+# URL yazılırken simge tahmini için beklenecek süre (ms)
+GUESS_ICON_DELAY = 300
+# Simge seçicide indirilen favicon'un seçili olduğunu gösteren ad
+SELECTED_FAVICON = "favicon:selected"
 CATEGORY_ID, CATEGORY_NAME = range(2)
 BROWSER_OBJ, BROWSER_NAME = range(2)
 
+_tld_extractor = None
+
+# Alan adını ayrıştırır, sonuçlar sunucu adı başına saklanır.
+# tldextract paketle gelen son ek listesini kullanır; ağa çıkmaz ve diske önbellek yazmaz.
+@functools.lru_cache(maxsize=256)
+def extract_domain(host):
+    global _tld_extractor
+    if _tld_extractor is None:
+        import tldextract
+        _tld_extractor = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+    return _tld_extractor(host)
+
+#Geçerli simge temasındaki tüm simge adlarının dizini.
+#İlk kullanımda bir kez oluşturulur, tema değişince yeniden kurulur;
+#böylece simge tahmini her aday için tek bir küme aramasıdır.
+class IconNameIndex():
+
+    # Alan adından tahmin edilemeyen siteler için simge adları
+    ALIASES = {
+        "gmail": ["web-google-gmail"],
+        "mail.google": ["web-google-gmail"],
+        "youtube": ["web-google-youtube"],
+        "youtu": ["web-google-youtube"],
+        "messenger": ["web-facebook-messenger"],
+        "whatsapp": ["web-whatsapp", "whatsapp"],
+        "x": ["web-twitter", "twitter"],
+        "outlook": ["web-microsoft-outlook", "ms-outlook"],
+        "outlook.live": ["web-microsoft-outlook", "ms-outlook"],
+        "office": ["web-microsoft-office", "ms-office"],
+        "discordapp": ["web-discord", "discord"],
+    }
+
+    def __init__(self, icon_theme):
+        self.icon_theme = icon_theme
+        self.names = None
+        icon_theme.connect("changed", self.on_theme_changed)
+
+    def on_theme_changed(self, icon_theme):
+        self.names = None
+
+    def get_names(self):
+        if self.names is None:
+            self.names = frozenset(ThemedIconChooser.get_theme_cache(self.icon_theme).list_icons())
+        return self.names
+
+    # Aday adlar en özelden en genele doğru sıralanır
+    def get_candidates(self, domain, subdomain):
+        labels = [label for label in (subdomain or "").split(".") if label not in ["", "www"]]
+        candidates = []
+        for label in labels:
+            candidates += self.ALIASES.get("%s.%s" % (label, domain), [])
+        for label in labels:
+            candidates += ["web-%s-%s" % (domain, label), "%s-%s" % (domain, label)]
+        candidates += self.ALIASES.get(domain, [])
+        candidates += ["web-%s" % domain, domain]
+        return candidates
+
+    def lookup(self, domain, subdomain=None):
+        names = self.get_names()
+        for candidate in self.get_candidates(domain, subdomain):
+            if candidate in names:
+                return candidate
+        return None
+
+#Simgeleri ana döngüyü bloklamadan sınırlı sayıda iş parçacığında çözer.
+#Görünen satırların simgeleri önce çözülür, bitenler toplu halde ana döngüye aktarılır.
+class IconLoader():
+
+    def __init__(self, callback, max_workers=4):
+        self.callback = callback
+        self.pending = OrderedDict()
+        self.urgent = []
+        self.results = []
+        self.flush_source = None
+        self.condition = threading.Condition()
+        for i in range(max_workers):
+            thread = threading.Thread(target=self.work)
+            thread.daemon = True
+            thread.start()
+
+    def request(self, key, job):
+        with self.condition:
+            self.pending[key] = job
+            self.condition.notify()
+
+    # Verilen anahtarları kuyruğun önüne alır (ör. ekranda görünen satırlar)
+    def prioritize(self, keys):
+        with self.condition:
+            self.urgent = [key for key in keys if key in self.pending]
+
+    def clear(self):
+        with self.condition:
+            self.pending.clear()
+            self.urgent = []
+
+    def work(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                key = None
+                while self.urgent and key not in self.pending:
+                    key = self.urgent.pop(0)
+                if key in self.pending:
+                    job = self.pending.pop(key)
+                else:
+                    key, job = self.pending.popitem(last=False)
+            try:
+                pixbuf = job()
+            except Exception:
+                traceback.print_exc()
+                pixbuf = None
+            with self.condition:
+                self.results.append((key, pixbuf))
+                if self.flush_source is None:
+                    self.flush_source = GLib.idle_add(self.flush, priority=GLib.PRIORITY_LOW)
+
+    def flush(self):
+        with self.condition:
+            results = self.results
+            self.results = []
+            self.flush_source = None
+        self.callback(results)
+        return False
+
+#Liste için önceden küçültülmüş simgeleri ~/.cache altında saklar.
+#Kayıtlar kaynak dosya, mtime, hedef boyut ve ölçek ile anahtarlanır; en eskiler silinerek boyut sınırı korunur.
+class ThumbnailCache():
+
+    def __init__(self, directory=THUMBNAILS_DIR, max_size=16 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.total_size = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, filename, size, scale):
+        stat = os.stat(filename)
+        key = "%s:%d:%d:%d:%d" % (filename, stat.st_mtime_ns, stat.st_size, size, scale)
+        return os.path.join(self.directory, hashlib.sha1(key.encode("UTF-8")).hexdigest() + ".png")
+
+    def load(self, filename, size, scale):
+        path = self.get_path(filename, size, scale)
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
+            with self.lock:
+                self.hits += 1
+            # Son kullanımı işaretleyelim, ama her okumada diske yazmayalım
+            if time.time() - os.stat(path).st_mtime > 24 * 60 * 60:
+                os.utime(path)
+            return pixbuf
+        except GLib.Error:
+            pass
+        with self.lock:
+            self.misses += 1
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(filename, -1, size * scale)
+        self.save(pixbuf, path)
+        return pixbuf
+
+    def save(self, pixbuf, path):
+        tmp_path = "%s.%d.tmp" % (path, threading.get_ident())
+        try:
+            pixbuf.savev(tmp_path, "png", [], [])
+            os.replace(tmp_path, path)
+            with self.lock:
+                if self.total_size is None:
+                    self.total_size = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+                else:
+                    self.total_size += os.stat(path).st_size
+                if self.total_size > self.max_size:
+                    self.evict()
+        except Exception:
+            traceback.print_exc()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # En uzun süredir kullanılmayan kayıtları sınırın dörtte üçüne inene kadar siler
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                pass
+        for mtime, size, path in sorted(entries):
+            if self.total_size <= self.max_size * 3 // 4:
+                break
+            try:
+                os.remove(path)
+                self.total_size -= size
+            except OSError:
+                pass
+
+#Hücre çizimi için oluşturulan cairo yüzeylerini saklar (LRU).
+#Anahtar pixbuf nesnesinin kendisidir, ölçek değişince tüm yüzeyler atılır.
+class SurfaceCache():
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.scale = None
+
+    def get(self, pixbuf, scale):
+        if scale != self.scale:
+            self.clear()
+            self.scale = scale
+        key = id(pixbuf)
+        entry = self.surfaces.get(key)
+        # Pixbuf kayıtta tutulduğu için id() başka bir nesneye geçemez
+        if entry is not None and entry[0] is pixbuf:
+            self.surfaces.move_to_end(key)
+            return entry[1]
+        surface = Gdk.cairo_surface_create_from_pixbuf(pixbuf, scale)
+        self.surfaces[key] = (pixbuf, surface)
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
 class MyApplication(Gtk.Application):
     # Ana başlatma rutini
     def __init__(self, application_id, flags):
@@ -47,8 +277,15 @@ class MyApplication(Gtk.Application):
         else:
             window = QuicklyWebManagerWindow(self)
             self.add_window(window.window)
+            if os.environ.get("QUICKLY_STARTUP_BENCHMARK"):
+                # Başlangıç ölçümü: pencere ekrana geldiğinde haber verip çıkalım
+                window.window.connect("map-event", self.on_benchmark_map)
             window.window.show()
 
+    def on_benchmark_map(self, window, event):
+        print("mapped", flush=True)
+        GLib.idle_add(self.quit)
+
 class QuicklyWebManagerWindow():
 
     def __init__(self, application):
@@ -152,6 +389,14 @@ class QuicklyWebManagerWindow():
         self.treeview.set_model(self.model)
         self.treeview.get_selection().connect("changed", self.on_webapp_selected)
         self.treeview.connect("row-activated", self.on_webapp_activated)
+        self.treeview.get_vadjustment().connect("value-changed", self.on_webapps_scrolled)
+
+        # Simgeler arka planda çözülür, o zamana kadar varsayılan simge gösterilir
+        self.placeholder_pixbuf = None
+        self.icon_loader = IconLoader(self.on_icons_loaded)
+        self.thumbnail_cache = ThumbnailCache()
+        self.surface_cache = SurfaceCache()
+        self.window.connect("notify::scale-factor", self.on_scale_factor_changed)
 
         #Kategori kutusu
         category_model = Gtk.ListStore(str,str) 
@@ -191,17 +436,49 @@ class QuicklyWebManagerWindow():
             self.browser_combo.hide()
         self.browser_combo.connect("changed", self.on_browser_changed)
 
+        # Başlatıcı dizinini izleyelim, değişiklikler listeye satır satır uygulanır
+        self.webapp_rows = {}
+        self.link_monitors = None
+        self.pending_paths = set()
+        self.pending_source = None
+        if self.settings.get_boolean("monitor-launchers"):
+            self.monitor_launchers()
+
         self.load_webapps()
+
+        # Önceki oturumda yarıda kalan silmeleri tamamlayalım
+        self.purge_jobs = 0
+        self.purge_trash()
+
+        # Başlatıcısı kalmamış eski profiller arka planda temizlenir
+        if self.settings.get_boolean("collect-orphan-profiles"):
+            self.manager.reclaim_orphan_profiles()
         
+        # Favicon adayları geldikçe gösterilir; eski aramalardan gelenler yok sayılır
+        self.favicon_request = 0
+        self.favicon_heights = []
+        self.selected_favicon = None
+
+        # URL yazılırken simge tahmini ertelenir; ayrıştırıcı ekleme sayfası ilk açıldığında arka planda hazırlanır
+        self.guess_icon_source = None
+        self.icon_name_index = IconNameIndex(self.icon_theme)
+        self.url_analysis_prepared = False
+
         # Tamam düğmesi ile kullanılır. Bir web uygulaması düzenlediğimizi yada yeni bir uygulama eklediğimizi gösterir.
 
         self.edit_mode = False
 
     def data_func_surface(self, column, cell, model, iter_, *args):
         pixbuf = model.get_value(iter_, COL_ICON)
-        surface = Gdk.cairo_surface_create_from_pixbuf(pixbuf, self.window.get_scale_factor())
+        surface = self.surface_cache.get(pixbuf, self.window.get_scale_factor())
         cell.set_property("surface", surface)
 
+    # Ölçek değişince eski yüzeyler geçersiz, simgeler yeni boyutta yeniden çözülür
+    def on_scale_factor_changed(self, window, param):
+        self.surface_cache.clear()
+        for row in self.model:
+            self.request_webapp_icon(row[COL_WEBAPP])
+
     def open_keyboard_shortcuts(self, widget):
         gladefile = "/usr/share/web-manager/shortcuts.ui"
         builder = Gtk.Builder()
@@ -261,12 +538,15 @@ class QuicklyWebManagerWindow():
             elif event.keyval == Gdk.KEY_d:
                 self.on_remove_button(self.remove_button)
         elif event.keyval == Gdk.KEY_Escape:
-            self.load_webapps()
+            self.refresh_webapps()
 
     def on_remove_button(self, widget):
         if self.selected_webapp != None:
-            self.manager.delete_webbapp(self.selected_webapp)
-            self.load_webapps()
+            # Profiller yeniden adlandırılır, liste hemen güncellenir; silme arka planda sürer
+            path = self.selected_webapp.path
+            trash = self.manager.delete_webbapp(self.selected_webapp, purge=False)
+            self.refresh_webapps(path)
+            self.purge_trash(trash)
 
     def run_webapp(self, webapp):
         if webapp != None:
@@ -284,20 +564,21 @@ class QuicklyWebManagerWindow():
         url = self.get_url()
 
         icon = self.icon_chooser.get_name()
-        if "/tmp" in icon:
-            # Simge yolu /tmp içindeyse taşıyın
+        if icon == SELECTED_FAVICON and self.selected_favicon is not None:
+            # İndirilen favicon yalnızca şimdi diske yazılır
             filename = "".join(filter(str.isalpha, name)) + ".png"
-            new_path = os.path.join(ICONS_DIR, filename)
-            shutil.copyfile(icon, new_path)
-            icon = new_path
+            icon = os.path.join(ICONS_DIR, filename)
+            with open(icon, 'wb') as icon_file:
+                icon_file.write(self.selected_favicon.data)
         if self.edit_mode:
             self.manager.edit_webapp(self.selected_webapp.path, name, url, icon, category)
-            self.load_webapps()
+            self.refresh_webapps(self.selected_webapp.path)
         else:
-            self.manager.create_webapp(name, url, icon, category, browser, )
-            self.load_webapps()
+            path = self.manager.create_webapp(name, url, icon, category, browser, )
+            self.refresh_webapps(path)
 
     def on_add_button(self, widget):
+        self.prepare_url_analysis()
         self.name_entry.set_text("")
         self.url_entry.set_text("")
         self.icon_chooser.set_name("web-manager")
@@ -312,6 +593,7 @@ class QuicklyWebManagerWindow():
 
     def on_edit_button(self, widget):
         if self.selected_webapp != None:
+            self.prepare_url_analysis()
             self.name_entry.set_text(self.selected_webapp.name)
             self.icon_chooser.set_name(self.selected_webapp.icon)
             self.url_entry.set_text(self.selected_webapp.url)
@@ -332,7 +614,7 @@ class QuicklyWebManagerWindow():
             self.name_entry.grab_focus()
 
     def on_cancel_button(self, widget):
-        self.load_webapps()
+        self.refresh_webapps()
 
     def on_cancel_favicon_button(self, widget):
         self.stack.set_visible_child_name("add_page")
@@ -344,7 +626,9 @@ class QuicklyWebManagerWindow():
         self.spinner.show()
         self.favicon_stack.set_visible_child_name("page_spinner")
         self.favicon_button.set_sensitive(False)
-        self.download_icons(url)
+        self.favicon_request += 1
+        self.favicon_heights = []
+        self.download_icons(url, self.favicon_request)
 
     # URL girişinin içindekileri okur ve doğrulanmış bir sürümü döndürür
     def get_url(self):
@@ -356,41 +640,59 @@ class QuicklyWebManagerWindow():
         return url
 
     @_async
-    def download_icons(self, url):
-        images = download_favicon(url)
-        self.show_favicons(images)
+    def download_icons(self, url, request):
+        images = download_favicon(url, callback=lambda image: self.add_favicon(request, image))
+        self.finish_favicons(request, images)
+
+    @idle
+    def add_favicon(self, request, favicon):
+        if request != self.favicon_request:
+            return
+        box = self.builder.get_object("favicon_flow")
+        if len(self.favicon_heights) == 0:
+            # İlk simge geldi, seçim sayfasına geçelim
+            for child in box.get_children():
+                box.remove(child)
+            self.stack.set_visible_child_name("favicon_page")
+            self.headerbar.set_subtitle(_("Bir simge seçin"))
+
+        # En büyük simgeler başta kalsın
+        position = len([height for height in self.favicon_heights if height >= favicon.height])
+        self.favicon_heights.insert(position, favicon.height)
+
+        # Önizleme doğrudan bellekteki veriden oluşturulur
+        loader = GdkPixbuf.PixbufLoader()
+        loader.write(favicon.data)
+        loader.close()
+
+        button = Gtk.Button()
+        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        image = Gtk.Image()
+        image.set_from_pixbuf(loader.get_pixbuf())
+        dimensions = Gtk.Label()
+        dimensions.set_text("%dx%d" % (favicon.width, favicon.height))
+        source = Gtk.Label()
+        source.set_text(favicon.source)
+        content_box.pack_start(image, 0, True, True)
+        # content_box.pack_start(source, 0, True, True)
+        content_box.pack_start(dimensions, 0, True, True)
+        button.add(content_box)
+        button.connect("clicked", self.on_favicon_selected, favicon)
+        box.insert(button, position)
+        button.show_all()
 
     @idle
-    def show_favicons(self, images):
+    def finish_favicons(self, request, images):
+        if request != self.favicon_request:
+            return
         self.spinner.stop()
         self.spinner.hide()
         self.favicon_stack.set_visible_child_name("page_image")
         self.favicon_button.set_sensitive(True)
-        if len(images) > 0:
-            self.stack.set_visible_child_name("favicon_page")
-            self.headerbar.set_subtitle(_("Bir simge seçin"))
-            box = self.builder.get_object("favicon_flow")
-            for child in box.get_children():
-                box.remove(child)
-            for origin, pil_image, path in images:
-                button = Gtk.Button()
-                content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-                image = Gtk.Image()
-                image.set_from_file(path)
-                dimensions = Gtk.Label()
-                dimensions.set_text("%dx%d" % (pil_image.width, pil_image.height))
-                source = Gtk.Label()
-                source.set_text(origin)
-                content_box.pack_start(image, 0, True, True)
-                # content_box.pack_start(source, 0, True, True)
-                content_box.pack_start(dimensions, 0, True, True)
-                button.add(content_box)
-                button.connect("clicked", self.on_favicon_selected, path)
-                box.add(button)
-            box.show_all()
-
-    def on_favicon_selected(self, widget, path):
-        self.icon_chooser.set_name(path)
+
+    def on_favicon_selected(self, widget, favicon):
+        self.selected_favicon = favicon
+        self.icon_chooser.set_name(SELECTED_FAVICON)
         self.stack.set_visible_child_name("add_page")
         self.headerbar.set_subtitle(_("Add a New Web App"))
 
@@ -409,7 +711,26 @@ class QuicklyWebManagerWindow():
         else:
             self.favicon_button.set_sensitive(False)
         self.toggle_ok_sensitivity()
+        if self.guess_icon_source is not None:
+            GLib.source_remove(self.guess_icon_source)
+        self.guess_icon_source = GLib.timeout_add(GUESS_ICON_DELAY, self.on_guess_icon_timeout)
+
+    def on_guess_icon_timeout(self):
+        self.guess_icon_source = None
         self.guess_icon()
+        return False
+
+    # İlk ayrıştırma son ek listesini ve tldextract ile birlikte ağ kütüphanelerini yükler.
+    # Pencere açılışını yavaşlatmamak için bu, ekleme ya da düzenleme sayfası ilk gösterildiğinde
+    # arayüzü bekletmeden yapılır.
+    def prepare_url_analysis(self):
+        if not self.url_analysis_prepared:
+            self.url_analysis_prepared = True
+            self.load_url_analysis()
+
+    @_async
+    def load_url_analysis(self):
+        extract_domain("example.com")
 
     def toggle_ok_sensitivity(self):
         if self.name_entry.get_text() == "" or self.get_url() == "":
@@ -420,60 +741,221 @@ class QuicklyWebManagerWindow():
     def guess_icon(self):
         url = self.get_url().lower()
         if url != "":
-            info = tldextract.extract(url)
-            icon = None
+            try:
+                host = urllib.parse.urlparse(url).hostname or ""
+            except ValueError:
+                return
+            info = extract_domain(host)
             if info.domain == None or info.domain == "":
                 return
-            if info.domain == "google" and info.subdomain != None and info.subdomain != "":
-                if info.subdomain == "mail":
-                    icon = "web-%s-gmail" % info.domain
-                else:
-                    icon = "web-%s-%s" % (info.domain, info.subdomain)
-            elif info.domain == "gmail":
-                icon = "web-google-gmail"
-            elif info.domain == "youtube":
-                icon = "web-google-youtube"
-            if icon != None and self.icon_theme.has_icon(icon):
+            icon = self.icon_name_index.lookup(info.domain, info.subdomain)
+            if icon != None:
                 self.icon_chooser.set_name(icon)
-            elif self.icon_theme.has_icon("web-%s" % info.domain):
-                self.icon_chooser.set_name("web-%s" % info.domain)
-            elif self.icon_theme.has_icon(info.domain):
-                self.icon_chooser.set_name(info.domain)
 
     def load_webapps(self):
         # Ağaç görünümünü ve seçimi temizleyelim
         self.model.clear()
-        self.selected_webapp = None
-        self.remove_button.set_sensitive(False)
-        self.edit_button.set_sensitive(False)
-        self.run_button.set_sensitive(False)
+        self.webapp_rows = {}
+        self.icon_loader.clear()
+        self.clear_selection()
 
         webapps = self.manager.get_webapps()
         for webapp in webapps:
             if webapp.is_valid:
-                if "/" in webapp.icon and os.path.exists(webapp.icon):
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(webapp.icon, -1, 32 * self.window.get_scale_factor())
-                else:
-                    if self.icon_theme.has_icon(webapp.icon):
-                        pixbuf = self.icon_theme.load_icon(webapp.icon, 32 * self.window.get_scale_factor(), 0)
-                    else:
-                        pixbuf = self.icon_theme.load_icon("web-manager", 32 * self.window.get_scale_factor(), 0)
+                self.add_webapp_row(webapp)
+                if self.link_monitors is not None:
+                    self.update_link_monitor(webapp.path)
 
-                iter = self.model.insert_before(None, None)
-                self.model.set_value(iter, COL_ICON, pixbuf)
-                self.model.set_value(iter, COL_NAME, webapp.name)
-                self.model.set_value(iter, COL_WEBAPP, webapp)
+        # Simgeleri listedeki sırayla isteyelim, böylece üstteki satırlar önce dolar
+        for row in self.model:
+            self.request_webapp_icon(row[COL_WEBAPP])
 
         # ilk web uygulamasını seçelim
         path = Gtk.TreePath.new_first()
         self.treeview.get_selection().select_path(path)
 
+        self.show_main_page()
+
+    def show_main_page(self):
         # Ana sayfaya geç
         self.stack.set_visible_child_name("main_page")
         self.headerbar.set_subtitle(_("Hızlı Web Yöneticisi"))
 
+    # Çöpe taşınan profilleri arka planda siler, ilerleme ana sayfanın alt başlığında gösterilir
+    def purge_trash(self, paths=None):
+        self.purge_jobs += 1
+        self.manager.purge_trash_in_background(paths, self.on_purge_progress)
+
+    @idle
+    def on_purge_progress(self, remaining, total):
+        if remaining == 0:
+            self.purge_jobs -= 1
+        if self.stack.get_visible_child_name() != "main_page":
+            return
+        if self.purge_jobs > 0 and total > 0:
+            self.headerbar.set_subtitle(_("Removing web app data (%d/%d)") % (total - remaining, total))
+        elif self.purge_jobs == 0:
+            self.headerbar.set_subtitle(_("Hızlı Web Yöneticisi"))
+
+    def clear_selection(self):
+        self.selected_webapp = None
+        self.remove_button.set_sensitive(False)
+        self.edit_button.set_sensitive(False)
+        self.run_button.set_sensitive(False)
+
+    def get_placeholder_pixbuf(self):
+        size = 32 * self.window.get_scale_factor()
+        if self.placeholder_pixbuf is None or self.placeholder_pixbuf.get_height() != size:
+            self.placeholder_pixbuf = self.icon_theme.load_icon("web-manager", size, 0)
+        return self.placeholder_pixbuf
+
+    # Simgeyi arka planda çözülmek üzere sıraya koyar.
+    # Tema işlemleri iş parçacığı güvenli değil, bu yüzden simge dosyası burada bulunur.
+    def request_webapp_icon(self, webapp):
+        scale = self.window.get_scale_factor()
+        size = 32 * scale
+        key = (webapp.path, webapp.icon)
+        if "/" in webapp.icon and os.path.exists(webapp.icon):
+            filename = webapp.icon
+        elif self.icon_theme.has_icon(webapp.icon):
+            info = self.icon_theme.lookup_icon(webapp.icon, size, 0)
+            filename = info.get_filename() if info is not None else None
+            if filename is None:
+                # Gömülü simgelerin dosyası yok, bunlar küçük ve hızlı yüklenir
+                self.on_icons_loaded([(key, self.icon_theme.load_icon(webapp.icon, size, 0))])
+                return
+        else:
+            return
+        self.icon_loader.request(key, lambda: self.thumbnail_cache.load(filename, 32, scale))
+
+    def on_icons_loaded(self, results):
+        for (path, icon), pixbuf in results:
+            reference = self.webapp_rows.get(path)
+            if pixbuf is None or reference is None or not reference.valid():
+                continue
+            iter = self.model.get_iter(reference.get_path())
+            if self.model.get_value(iter, COL_WEBAPP).icon == icon:
+                self.model.set_value(iter, COL_ICON, pixbuf)
+
+    def on_webapps_scrolled(self, adjustment):
+        visible_range = self.treeview.get_visible_range()
+        if visible_range is None:
+            return
+        start, end = visible_range
+        keys = []
+        iter = self.model.get_iter(start)
+        while iter is not None:
+            webapp = self.model.get_value(iter, COL_WEBAPP)
+            keys.append((webapp.path, webapp.icon))
+            if self.model.get_path(iter).compare(end) >= 0:
+                break
+            iter = self.model.iter_next(iter)
+        self.icon_loader.prioritize(keys)
+
+    def add_webapp_row(self, webapp):
+        iter = self.model.insert_before(None, None)
+        self.model.set_value(iter, COL_ICON, self.get_placeholder_pixbuf())
+        self.model.set_value(iter, COL_NAME, webapp.name)
+        self.model.set_value(iter, COL_WEBAPP, webapp)
+        self.webapp_rows[webapp.path] = Gtk.TreeRowReference.new(self.model, self.model.get_path(iter))
+        return iter
+
+    # Değişen başlatıcıyı listeye uygular ve ana sayfaya döner.
+    # İzleme kapalıysa liste eskisi gibi baştan yüklenir.
+    def refresh_webapps(self, path=None):
+        if self.link_monitors is None:
+            self.load_webapps()
+            return
+        selection = self.treeview.get_selection()
+        if path is not None:
+            iter = self.update_webapp_row(path)
+            if iter is not None:
+                selection.select_iter(iter)
+        if selection.count_selected_rows() == 0:
+            selection.select_path(Gtk.TreePath.new_first())
+        self.show_main_page()
+
+    # Tek bir başlatıcı için satır ekler, günceller ya da siler
+    def update_webapp_row(self, path):
+        webapp = self.manager.get_webapp(path)
+        if self.link_monitors is not None:
+            self.update_link_monitor(path)
+
+        iter = None
+        reference = self.webapp_rows.get(path)
+        if reference is not None and reference.valid():
+            iter = self.model.get_iter(reference.get_path())
+
+        if webapp is None or not webapp.is_valid:
+            if iter is not None:
+                self.model.remove(iter)
+                del self.webapp_rows[path]
+                if self.selected_webapp is not None and self.selected_webapp.path == path:
+                    self.clear_selection()
+            return None
+
+        if iter is None:
+            iter = self.add_webapp_row(webapp)
+            self.request_webapp_icon(webapp)
+            return iter
+
+        old_webapp = self.model.get_value(iter, COL_WEBAPP)
+        self.model.set_value(iter, COL_WEBAPP, webapp)
+        if old_webapp.icon != webapp.icon:
+            self.request_webapp_icon(webapp)
+        if old_webapp.name != webapp.name:
+            self.model.set_value(iter, COL_NAME, webapp.name)
+        if self.selected_webapp is not None and self.selected_webapp.path == path:
+            self.selected_webapp = webapp
+        return iter
+
+    def monitor_launchers(self):
+        self.link_monitors = {}
+        self.apps_monitor = Gio.File.new_for_path(APPS_DIR).monitor_directory(Gio.FileMonitorFlags.NONE, None)
+        self.apps_monitor.connect("changed", self.on_launcher_changed, None)
+
+    # Epiphany başlatıcıları profil dizinindeki dosyaya sembolik link,
+    # içerikleri değiştiğinde haber almak için hedef dosyaları ayrıca izleyelim
+    def update_link_monitor(self, path):
+        target = os.path.realpath(path) if os.path.islink(path) else None
+        current = self.link_monitors.get(path)
+        if current is not None:
+            if current[0] == target:
+                return
+            current[1].cancel()
+            del self.link_monitors[path]
+        if target is not None and os.path.exists(target):
+            monitor = Gio.File.new_for_path(target).monitor_file(Gio.FileMonitorFlags.NONE, None)
+            monitor.connect("changed", self.on_launcher_changed, path)
+            self.link_monitors[path] = (target, monitor)
+
+    def on_launcher_changed(self, monitor, file, other_file, event_type, link_path):
+        if event_type == Gio.FileMonitorEvent.ATTRIBUTE_CHANGED:
+            return
+        if link_path is not None:
+            self.pending_paths.add(link_path)
+        else:
+            for changed_file in [file, other_file]:
+                if changed_file is None:
+                    continue
+                filename = changed_file.get_basename()
+                if filename.startswith("webapp-") and filename.endswith(".desktop"):
+                    self.pending_paths.add(os.path.join(APPS_DIR, filename))
+        # Aynı dosya için art arda gelen olayları birleştirelim
+        if self.pending_paths and self.pending_source is None:
+            self.pending_source = GLib.timeout_add(200, self.apply_pending_changes)
+
+    def apply_pending_changes(self):
+        self.pending_source = None
+        paths = self.pending_paths
+        self.pending_paths = set()
+        for path in paths:
+            self.update_webapp_row(path)
+        return False
 
 if __name__ == "__main__":
+    import setproctitle
+    setproctitle.setproctitle("quickly-web-manager")
     application = MyApplication("org.x.quickly-web-manager", Gio.ApplicationFlags.FLAGS_NONE)
     application.run()
 